@@ -0,0 +1,227 @@
+# benchmark.py - Headless timings of TaskManager and the task list refresh
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from storage import create_storage
+from task import DATE_FORMAT
+from task_manager import TaskManager
+
+# Version of the JSON result layout, bumped when fields change meaning
+RESULT_FORMAT = 1
+
+WORDS = (
+    "buy", "call", "email", "fix", "review", "plan", "write", "read", "clean",
+    "book", "pay", "update", "meeting", "report", "groceries", "dentist",
+    "invoice", "garden", "release", "budget", "slides", "car", "taxes", "gym"
+)
+PRIORITIES = ("high", "medium", "low")
+
+def generate_tasks(count, seed=0):
+    """Return count synthetic task dicts in the task file format"""
+    rng = random.Random(seed)
+    start = int(time.time()) - 365 * 24 * 3600
+    tasks = []
+    for number in range(1, count + 1):
+        created = start + rng.randrange(365 * 24 * 60) * 60
+        tasks.append({
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))),
+            "priority": rng.choice(PRIORITIES),
+            "date_created": datetime.fromtimestamp(created).strftime(DATE_FORMAT),
+            "completed": rng.random() < 0.3,
+            "id": str(number)
+        })
+    return tasks
+
+
+class Benchmark:
+    def __init__(self, repeat=3, ops=100, seed=0):
+        """Collect timings; read-only cases take the best of repeat runs
+
+        Mutation cases run ops single-task operations, each saved
+        synchronously, and report the total and the per-operation time.
+        """
+        self.repeat = repeat
+        self.ops = ops
+        self.seed = seed
+        self.results = []
+        self.skipped = []
+
+    def record(self, name, engine, size, seconds, ops=1, **extra):
+        """Store one timing"""
+        result = {
+            "name": name,
+            "engine": engine,
+            "size": size,
+            "ops": ops,
+            "seconds": seconds,
+            "per_op": seconds / ops
+        }
+        result.update(extra)
+        self.results.append(result)
+        print(f"{name:<20}{engine:<10}{size:>10}{seconds * 1000:>12.2f} ms", file=sys.stderr)
+
+    def skip(self, name, size, reason):
+        """Note a case that could not run here"""
+        self.skipped.append({"name": name, "size": size, "reason": reason})
+        print(f"{name:<20}{'':<10}{size:>10}  skipped: {reason}", file=sys.stderr)
+
+    def best_of(self, function):
+        """Return the shortest run time of a function over repeat calls"""
+        best = None
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def timed(self, function):
+        """Return the run time of a single call"""
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+
+    def run_engine(self, engine, size, directory):
+        """Time loading, saving, mutations and queries on one engine"""
+        tasks_file = os.path.join(directory, f"{engine}-{size}.json")
+        storage = create_storage(tasks_file, engine)
+        # save() refuses to overwrite data it has not read
+        storage.load()
+        storage.save(generate_tasks(size, self.seed))
+        storage.close()
+
+        task_manager = TaskManager(tasks_file, engine=engine, save_delay=None)
+        try:
+            self.record("load", engine, size, self.timed(task_manager.load_tasks))
+            self.record("save", engine, size, self.timed(task_manager.save_tasks))
+
+            rng = random.Random(self.seed)
+            self.record("add", engine, size, self.timed(
+                lambda: [task_manager.add_task(f"benchmark task {n}", rng.choice(PRIORITIES)) for n in range(self.ops)]
+            ), self.ops)
+
+            ids = rng.sample([task.id for task in task_manager.tasks], min(self.ops, size))
+            self.record("toggle", engine, size, self.timed(
+                lambda: [task_manager.toggle_task_status(task_id) for task_id in ids]
+            ), len(ids))
+            self.record("delete", engine, size, self.timed(
+                lambda: [task_manager.delete_task(task_id) for task_id in ids]
+            ), len(ids))
+
+            self.record("sort", engine, size, self.best_of(task_manager.get_sorted_tasks))
+            self.record("statistics", engine, size, self.best_of(task_manager.get_statistics))
+            self.record("rebuild_statistics", engine, size, self.best_of(task_manager.rebuild_statistics))
+            self.record("search", engine, size, self.best_of(lambda: task_manager.search_tasks("re", priority="high")))
+
+            errors = task_manager.get_save_errors()
+            if errors:
+                raise errors[0]
+        finally:
+            task_manager.close()
+
+    def run_ui(self, size, directory):
+        """Time a full task list refresh, if a display is available
+
+        Without a desktop, run the benchmark under a virtual display such as
+        xvfb-run to include this case.
+        """
+        try:
+            import tkinter as tk
+            root = tk.Tk()
+        except Exception as e:
+            self.skip("refresh_task_list", size, f"no display ({e})")
+            return
+
+        from theme_manager import ThemeManager
+        from todo_app import VIRTUAL_LIST_THRESHOLD
+        from ui_components import TaskListComponent, VirtualTaskListComponent
+
+        tasks_file = os.path.join(directory, f"ui-{size}.json")
+        storage = create_storage(tasks_file, "json")
+        # save() refuses to overwrite data it has not read
+        storage.load()
+        storage.save(generate_tasks(size, self.seed))
+
+        task_manager = TaskManager(tasks_file, storage=storage, save_delay=None)
+        try:
+            root.withdraw()
+            task_manager.load_tasks()
+
+            # Use the same list the application would pick for this size
+            if size >= VIRTUAL_LIST_THRESHOLD:
+                task_list_class = VirtualTaskListComponent
+            else:
+                task_list_class = TaskListComponent
+            task_list = task_list_class(root, ThemeManager(), task_manager, lambda: None)
+            task_list.frame.pack(fill=tk.BOTH, expand=True)
+
+            def refresh():
+                task_list.refresh_task_list()
+                root.update_idletasks()
+
+            self.record("refresh_task_list", "json", size, self.best_of(refresh),
+                        component=task_list_class.__name__)
+        finally:
+            task_manager.close()
+            root.destroy()
+
+    def to_json(self):
+        """Return the results as a JSON-serializable dict"""
+        return {
+            "format": RESULT_FORMAT,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": self.repeat,
+            "seed": self.seed,
+            "results": self.results,
+            "skipped": self.skipped
+        }
+
+
+def parse_args():
+    """Parse the command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark TaskManager and the task list refresh")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma-separated task counts, e.g. 1000,1000000")
+    parser.add_argument("--engines", default="json,journal,sqlite",
+                        help="comma-separated storage engines to benchmark")
+    parser.add_argument("--ops", type=int, default=100,
+                        help="number of add/toggle/delete operations per case")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs of each read-only case; the best one is kept")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the synthetic task generator")
+    parser.add_argument("--no-ui", action="store_true",
+                        help="skip the task list refresh even if a display is available")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    benchmark = Benchmark(repeat=args.repeat, ops=args.ops, seed=args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(size) for size in args.sizes.split(",")):
+            for engine in args.engines.split(","):
+                benchmark.run_engine(engine, size, directory)
+            if args.no_ui:
+                benchmark.skip("refresh_task_list", size, "disabled with --no-ui")
+            else:
+                benchmark.run_ui(size, directory)
+
+    results = json.dumps(benchmark.to_json(), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(results + "\n")
+    else:
+        print(results)
@@ -0,0 +1,131 @@
+# cli.py - Command-line interface for scripts, without a window
+
+import argparse
+import json
+import sys
+
+from ipc_server import ipc_supported, send_request
+from task_commands import execute
+from task_manager import TaskManager
+
+
+def parse_args(argv=None):
+    """Parse the command line"""
+    parser = argparse.ArgumentParser(description="Manage Task Master tasks from the command line")
+    parser.add_argument("--tasks-file", default="tasks.json",
+                        help="task file to use when no instance is running (default: tasks.json)")
+    parser.add_argument("--engine", choices=("json", "journal", "sqlite"), default="journal",
+                        help="storage backend of the task file")
+    parser.add_argument("--socket",
+                        help="socket of a running instance (default: the task file plus .sock)")
+    parser.add_argument("--local", action="store_true",
+                        help="work on the task file even if an instance is running")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add tasks")
+    add.add_argument("descriptions", nargs="+",
+                     help="task descriptions; - reads one description per line from stdin")
+    add.add_argument("--priority", choices=("high", "medium", "low"), default="medium")
+    add.add_argument("--due", default="", help="due date as YYYY-MM-DD HH:MM")
+
+    listing = commands.add_parser("list", help="list tasks in display order")
+    listing.add_argument("--search", default="", help="words the descriptions must contain")
+    listing.add_argument("--priority", choices=("high", "medium", "low"))
+    listing.add_argument("--status", choices=("pending", "completed"))
+    listing.add_argument("--json", action="store_true", help="print the tasks as JSON")
+
+    complete = commands.add_parser("complete", help="mark tasks as completed")
+    complete.add_argument("ids", nargs="+")
+
+    delete = commands.add_parser("delete", help="delete tasks")
+    delete.add_argument("ids", nargs="+")
+
+    export = commands.add_parser("export", help="write all tasks as a JSON array")
+    export.add_argument("--output", help="file to write instead of stdout")
+
+    return parser.parse_args(argv)
+
+
+def build_request(args):
+    """Turn the parsed command line into a command request"""
+    if args.command == "add":
+        descriptions = []
+        for description in args.descriptions:
+            if description == "-":
+                descriptions.extend(line.rstrip("\n") for line in sys.stdin)
+            else:
+                descriptions.append(description)
+        tasks = [
+            {"description": description, "priority": args.priority, "due": args.due}
+            for description in descriptions if description.strip()
+        ]
+        return {"command": "add", "tasks": tasks}
+    if args.command == "list":
+        return {"command": "list", "text": args.search, "priority": args.priority, "status": args.status}
+    if args.command in ("complete", "delete"):
+        return {"command": args.command, "ids": args.ids}
+    return {"command": args.command}
+
+
+def run_request(args, request):
+    """Run a request on the running instance, or on the task file if there is none"""
+    if not args.local and ipc_supported():
+        try:
+            response = send_request(args.socket or args.tasks_file + ".sock", request)
+        except (FileNotFoundError, ConnectionRefusedError):
+            # No instance is listening; other errors mean the request may
+            # have been received, so it is not repeated on the file
+            pass
+        else:
+            if not response.get("ok"):
+                raise ValueError(response.get("error", "The request failed"))
+            return response["result"]
+
+    task_manager = TaskManager(args.tasks_file, engine=args.engine, save_delay=None)
+    try:
+        task_manager.load_tasks()
+        result = execute(task_manager, request)
+    finally:
+        task_manager.close()
+
+    errors = task_manager.get_save_errors()
+    if errors:
+        raise errors[0]
+    return result
+
+
+def print_result(args, result):
+    """Print the result of a command"""
+    if args.command == "list" and not args.json:
+        for task in result["tasks"]:
+            status = "x" if task["completed"] else " "
+            due = f"  (due {task['due']})" if task.get("due") else ""
+            print(f"{task['id']:>6} [{status}] {task['priority']:<6} {task['description']}{due}")
+    elif args.command == "list":
+        json.dump(result["tasks"], sys.stdout, indent=2)
+        print()
+    elif args.command == "export":
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(result["tasks"], f, indent=2)
+        else:
+            json.dump(result["tasks"], sys.stdout, indent=2)
+            print()
+    else:
+        for task_id in result["ids"]:
+            print(task_id)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        result = run_request(args, build_request(args))
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print_result(args, result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
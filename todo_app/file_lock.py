@@ -0,0 +1,98 @@
+# file_lock.py - Exclusive lock shared between processes through a lock file
+
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no fcntl; msvcrt byte-range locks do the same job there
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive lock held through a lock file
+
+    Other processes locking the same path wait for it, and so do other
+    threads of this process. The thread holding the lock may acquire it
+    again, so storage methods can call each other while holding it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self, blocking=True):
+        """Take the lock; return False if blocking is off and it is held elsewhere"""
+        if not self._thread_lock.acquire(blocking):
+            return False
+
+        if self._depth == 0:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, "a+")
+                locked = _lock_file(self._file, blocking)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            if not locked:
+                self._thread_lock.release()
+                return False
+
+        self._depth += 1
+        return True
+
+    def release(self):
+        """Release one level of the lock"""
+        self._depth -= 1
+        if self._depth == 0:
+            _unlock_file(self._file)
+        self._thread_lock.release()
+
+    def close(self):
+        """Close the lock file; the lock must not be held"""
+        with self._thread_lock:
+            if self._file is not None and self._depth == 0:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def _lock_file(f, blocking):
+    """Lock an open file; return False if it is taken and blocking is off"""
+    if fcntl is not None:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(f.fileno(), flags)
+        except BlockingIOError:
+            return False
+        return True
+
+    # msvcrt.LK_LOCK gives up after ten seconds, so poll instead
+    while True:
+        try:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            time.sleep(0.05)
+
+
+def _unlock_file(f):
+    """Unlock a file locked by _lock_file"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
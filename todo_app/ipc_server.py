@@ -0,0 +1,146 @@
+# ipc_server.py - Local socket through which scripts talk to a running instance
+
+import asyncio
+import json
+import os
+import queue
+import socket
+import threading
+from concurrent.futures import Future
+
+# Largest request line accepted, enough for batches of many thousand tasks
+MAX_REQUEST_BYTES = 64 << 20
+
+# Seconds a client waits for the running instance to answer
+CLIENT_TIMEOUT = 30
+
+
+def ipc_supported():
+    """Check whether this platform has Unix domain sockets"""
+    return hasattr(socket, "AF_UNIX")
+
+
+class IpcServer:
+    """Asyncio Unix-socket server on a background thread
+
+    Clients send one JSON request per line and get one JSON response per
+    line. Requests are not run on the server thread: they wait in a queue
+    until the UI thread calls handle_pending(), so the task manager and
+    the widgets are only ever touched from the thread that owns them.
+    """
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+
+        # (request, Future) pairs waiting for handle_pending()
+        self.pending = queue.Queue()
+
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Start serving; return False if another instance already does"""
+        if not ipc_supported():
+            return False
+        if os.path.exists(self.socket_path):
+            try:
+                send_request(self.socket_path, None, timeout=1)
+                return False
+            except OSError:
+                # Left behind by an instance that did not shut down cleanly
+                os.unlink(self.socket_path)
+
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(
+            asyncio.start_unix_server(self._serve_client, self.socket_path, limit=MAX_REQUEST_BYTES)
+        )
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        return True
+
+    def handle_pending(self, handler):
+        """Answer the queued requests with handler(request) (UI thread)
+
+        handler returns the result dict; a ValueError it raises is sent
+        back as the error message.
+        """
+        while True:
+            try:
+                request, future = self.pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                response = {"ok": True, "result": handler(request)}
+            except ValueError as e:
+                response = {"ok": False, "error": str(e)}
+            except Exception as e:
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            future.set_result(response)
+
+    def close(self):
+        """Stop serving and remove the socket file"""
+        if self._loop is None:
+            return
+
+        # Clients still waiting for an answer get an error instead
+        self.handle_pending(self._refuse)
+
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+    def _refuse(self, request):
+        raise ValueError("The application is shutting down")
+
+    async def _serve_client(self, reader, writer):
+        """Answer the requests of one connection (server thread)"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {"ok": False, "error": "Request is not valid JSON"}
+                else:
+                    if request is None:
+                        # A ping from start() checking whether anyone listens
+                        response = {"ok": True, "result": None}
+                    else:
+                        future = Future()
+                        self.pending.put((request, future))
+                        response = await asyncio.wrap_future(future)
+                writer.write((json.dumps(response) + "\n").encode("utf-8"))
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            # The client went away or sent an oversized line
+            pass
+        finally:
+            writer.close()
+
+
+def send_request(socket_path, request, timeout=CLIENT_TIMEOUT):
+    """Send one request to a running instance and return its response
+
+    Raises OSError if no instance is listening on socket_path.
+    """
+    if not ipc_supported():
+        raise OSError("Unix domain sockets are not available")
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with client.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("The running instance closed the connection")
+    return json.loads(line)
@@ -1,19 +1,51 @@
 # main.py - Main entry point for the To-Do application
 
-import tkinter as tk
-from ttkthemes import ThemedTk
-from tkinter import messagebox
+import argparse
 
-from todo_app import ToDoApp
+from startup_profiler import StartupProfiler
 
-if __name__ == "__main__":
+
+def parse_args():
+    """Parse the command line options"""
+    parser = argparse.ArgumentParser(description="Task Master - Your Personal To-Do Manager")
+    parser.add_argument("--engine", choices=("json", "journal", "sqlite"), default="journal",
+                        help="storage backend for the task list")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print a phase-by-phase timing of startup")
+    parser.add_argument("--metrics-file",
+                        help="write operation latencies to this JSON file on exit")
+    parser.add_argument("--archive-after", type=int, default=30, metavar="DAYS",
+                        help="archive tasks completed more than DAYS days ago (0 disables)")
+    parser.add_argument("--no-ipc", action="store_true",
+                        help="don't accept commands from cli.py over a local socket")
+    return parser.parse_args()
+
+
+def create_root():
+    """Create the main window, themed when ttkthemes is available"""
     try:
         # Try to import ttkthemes for a more modern look
-        root = ThemedTk(theme="arc")
+        from ttkthemes import ThemedTk
+        return ThemedTk(theme="arc")
     except:
         # Fallback to standard Tk
+        import tkinter as tk
+        from tkinter import messagebox
         root = tk.Tk()
         messagebox.showinfo("Info", "For a better UI experience, install ttkthemes:\npip install ttkthemes")
+        return root
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    profiler = StartupProfiler(enabled=args.profile_startup)
+    
+    root = create_root()
+    profiler.mark("create window")
+    
+    from todo_app import ToDoApp
+    profiler.mark("import application")
     
-    app = ToDoApp(root)
-    root.mainloop()
\ No newline at end of file
+    app = ToDoApp(root, engine=args.engine, profiler=profiler, metrics_file=args.metrics_file,
+                 archive_after_days=args.archive_after, ipc=not args.no_ipc)
+    root.mainloop()
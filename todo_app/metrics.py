@@ -0,0 +1,147 @@
+# metrics.py - Latency histograms and timers for the application's hot paths
+
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Histogram buckets grow by 2**(1/4) (~19%) from one microsecond up
+BUCKETS_PER_OCTAVE = 4
+SMALLEST_BUCKET = 1e-6
+BUCKET_COUNT = 120
+
+class LatencyHistogram:
+    """Counts durations in logarithmic buckets
+
+    Recording is a log and an increment, and memory is fixed, so it can
+    stay on in production. Percentiles are accurate to one bucket (~19%).
+    """
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Add one duration in seconds"""
+        if seconds <= SMALLEST_BUCKET:
+            bucket = 0
+        else:
+            bucket = min(BUCKET_COUNT - 1, int(math.log2(seconds / SMALLEST_BUCKET) * BUCKETS_PER_OCTAVE) + 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the given fraction"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                upper = SMALLEST_BUCKET * 2 ** (bucket / BUCKETS_PER_OCTAVE)
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self):
+        """Return count, mean, p50/p95/p99 and max, in milliseconds"""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000
+        }
+
+
+class Metrics:
+    """Named latency histograms and gauges shared by the whole application"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        """Add a duration to the histogram of an operation"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def set_gauge(self, name, value):
+        """Store the latest value of a measurement such as a row count"""
+        self.gauges[name] = value
+
+    @contextmanager
+    def timer(self, name):
+        """Time the enclosed block under an operation name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator timing every call of a function under an operation name"""
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Return all histogram summaries and gauges"""
+        with self._lock:
+            histograms = {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+        return {"operations": histograms, "gauges": dict(self.gauges)}
+
+    def dump(self, path):
+        """Write the snapshot to a JSON file"""
+        data = self.snapshot()
+        data["created"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+class EventLoopProbe:
+    """Measures how late the event loop runs a timer
+
+    Every interval_ms a callback is scheduled with after(ms, callback)
+    (root.after in the app); the delay beyond the interval is recorded
+    as "event_loop_lag". A frozen UI shows up as large lag values.
+    """
+
+    def __init__(self, metrics, after, interval_ms=250):
+        self.metrics = metrics
+        self.after = after
+        self.interval_ms = interval_ms
+        self._expected = None
+
+    def start(self):
+        """Schedule the first probe"""
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        """Record the lag of this probe and schedule the next one"""
+        self.metrics.record("event_loop_lag", max(0.0, time.perf_counter() - self._expected))
+        self.start()
+
+
+# Registry used by the application modules
+metrics = Metrics()
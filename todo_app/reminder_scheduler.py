@@ -0,0 +1,130 @@
+# reminder_scheduler.py - Fires reminders for due tasks from a single timer
+
+import heapq
+import time
+
+# Longest single wait; Tk timers overflow for delays of several weeks
+MAX_DELAY_MS = 6 * 60 * 60 * 1000
+
+class ReminderScheduler:
+    """Keeps the due times of pending tasks in a heap and wakes up once per deadline
+
+    Only one timer is armed at a time, for the earliest due time, so idle
+    reminders cost nothing. Changing a due date pushes a new heap entry in
+    O(log N); the old entry is recognised as stale when it surfaces.
+
+    after(ms, callback) and after_cancel(timer) arm and cancel the timer
+    (root.after and root.after_cancel in the app). remind_callback receives
+    the list of tasks that came due.
+    """
+
+    def __init__(self, task_manager, after, after_cancel, remind_callback):
+        self.task_manager = task_manager
+        self.after = after
+        self.after_cancel = after_cancel
+        self.remind_callback = remind_callback
+
+        # (due, task ID) pairs, possibly stale; _due holds the live due time
+        self._heap = []
+        self._due = {}
+
+        # Due time each task was last reminded of, so edits don't repeat it
+        self._fired = {}
+
+        # The armed timer and the due time it was armed for
+        self._timer = None
+        self._timer_due = None
+
+        self.task_manager.add_listener(self.on_tasks_changed)
+        self.reschedule_all()
+
+    def schedule(self, task):
+        """Track a task's due time, or drop it if it has none or is done"""
+        if task.due is None or task.completed or self._fired.get(task.id) == task.due:
+            self._due.pop(task.id, None)
+            return
+        if self._due.get(task.id) == task.due:
+            return
+        self._due[task.id] = task.due
+        heapq.heappush(self._heap, (task.due, task.id))
+
+    def reschedule_all(self):
+        """Rebuild the heap from all tasks"""
+        self._due = {
+            task.id: task.due for task in self.task_manager.tasks
+            if task.due is not None and not task.completed and self._fired.get(task.id) != task.due
+        }
+        self._heap = [(due, task_id) for task_id, due in self._due.items()]
+        heapq.heapify(self._heap)
+        self.arm()
+
+    def on_tasks_changed(self, event):
+        """Keep the heap in step with task changes"""
+        if event.reset:
+            self.reschedule_all()
+            return
+
+        for task_id in event.removed:
+            self._due.pop(task_id, None)
+            self._fired.pop(task_id, None)
+        for task_id in event.added + event.updated:
+            task = self.task_manager.get_task(task_id)
+            if task is not None:
+                self.schedule(task)
+
+        # Stale entries pile up when due dates keep changing; drop them in bulk
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._heap = [(due, task_id) for task_id, due in self._due.items()]
+            heapq.heapify(self._heap)
+        self.arm()
+
+    def next_due(self):
+        """Return the earliest live due time, or None"""
+        while self._heap:
+            due, task_id = self._heap[0]
+            if self._due.get(task_id) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def arm(self):
+        """Make sure the timer is set for the earliest due time"""
+        due = self.next_due()
+        if due == self._timer_due:
+            return
+        self.cancel()
+        if due is None:
+            return
+
+        delay = max(0, min(MAX_DELAY_MS, int((due - time.time()) * 1000)))
+        self._timer = self.after(delay, self.fire)
+        self._timer_due = due
+
+    def cancel(self):
+        """Cancel the armed timer"""
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+        self._timer = None
+        self._timer_due = None
+
+    def fire(self):
+        """Hand the tasks that are due to remind_callback and re-arm"""
+        self._timer = None
+        self._timer_due = None
+
+        now = time.time()
+        due_tasks = []
+        while True:
+            due = self.next_due()
+            if due is None or due > now:
+                break
+            _, task_id = heapq.heappop(self._heap)
+            del self._due[task_id]
+            self._fired[task_id] = due
+            task = self.task_manager.get_task(task_id)
+            if task is not None:
+                due_tasks.append(task)
+
+        self.arm()
+        if due_tasks:
+            self.remind_callback(due_tasks)
@@ -0,0 +1,102 @@
+# save_scheduler.py - Coalesces task changes into debounced background saves
+
+import threading
+import time
+
+class SaveScheduler:
+    """Runs a save callback on a worker thread after changes settle
+
+    Every change marks the state dirty. The worker waits until the
+    coalescing window has passed since the first unsaved change and then
+    saves once, so a burst of mutations costs a single write. Exceptions
+    raised by the callbacks are passed to error_callback on the worker thread.
+
+    If sync_callback is given, the worker also calls it sync_delay seconds
+    after the first save since the last sync, so data a backend wrote but
+    did not sync yet reaches the disk even if no further change follows.
+    """
+
+    def __init__(self, save_callback, error_callback, delay=0.5, sync_callback=None, sync_delay=1.0):
+        self.save_callback = save_callback
+        self.error_callback = error_callback
+        self.delay = delay
+        self.sync_callback = sync_callback
+        self.sync_delay = sync_delay
+
+        self._condition = threading.Condition()
+        self._dirty = False
+        self._saving = False
+        self._deadline = None
+        self._sync_deadline = None
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        """Schedule a save once the coalescing window has passed"""
+        with self._condition:
+            if not self._dirty:
+                self._dirty = True
+                self._deadline = time.monotonic() + self.delay
+                self._condition.notify_all()
+
+    def flush(self):
+        """Save pending changes now and wait until they are written"""
+        with self._condition:
+            if self._dirty:
+                self._deadline = time.monotonic()
+                self._condition.notify_all()
+            while (self._dirty or self._saving) and self._thread.is_alive():
+                self._condition.wait()
+
+    def close(self):
+        """Flush pending changes and stop the worker thread"""
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        """Worker loop: wait for dirty state, then save it; sync after saves"""
+        while True:
+            with self._condition:
+                while not self._closed and not self._dirty and self._sync_deadline is None:
+                    self._condition.wait()
+                if self._closed and not self._dirty:
+                    # close() is followed by the backend's own flush
+                    return
+
+                if not self._dirty:
+                    remaining = self._sync_deadline - time.monotonic()
+                    if remaining > 0:
+                        self._condition.wait(remaining)
+                        continue
+                    self._sync_deadline = None
+                    saving = False
+                else:
+                    # Let further changes pile up until the window has passed
+                    remaining = self._deadline - time.monotonic()
+                    if remaining > 0:
+                        self._condition.wait(remaining)
+                        continue
+
+                    self._dirty = False
+                    self._saving = True
+                    saving = True
+
+            try:
+                if saving:
+                    self.save_callback()
+                else:
+                    self.sync_callback()
+            except Exception as e:
+                self.error_callback(e)
+            finally:
+                with self._condition:
+                    if saving:
+                        self._saving = False
+                        if self.sync_callback is not None and self._sync_deadline is None:
+                            self._sync_deadline = time.monotonic() + self.sync_delay
+                    self._condition.notify_all()
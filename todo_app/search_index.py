@@ -0,0 +1,96 @@
+# search_index.py - Inverted token index over task descriptions
+
+import re
+from bisect import bisect_left, insort
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    """Maps description tokens to task IDs for fast prefix search"""
+
+    def __init__(self):
+        # token -> set of task IDs whose description contains it
+        self.postings = {}
+        # task ID -> tokens indexed for it, used to unindex on change
+        self.task_tokens = {}
+        # All known tokens in sorted order for prefix lookups
+        self.sorted_tokens = []
+
+    def clear(self):
+        """Remove all tasks from the index"""
+        self.postings = {}
+        self.task_tokens = {}
+        self.sorted_tokens = []
+
+    def add(self, task):
+        """Index the description of a task"""
+        tokens = set(tokenize(task.description))
+        self.task_tokens[task.id] = tokens
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = set()
+                insort(self.sorted_tokens, token)
+            ids.add(task.id)
+
+    def add_many(self, tasks):
+        """Index several tasks, sorting new tokens in once"""
+        new_tokens = []
+        for task in tasks:
+            tokens = set(tokenize(task.description))
+            self.task_tokens[task.id] = tokens
+            for token in tokens:
+                ids = self.postings.get(token)
+                if ids is None:
+                    ids = self.postings[token] = set()
+                    new_tokens.append(token)
+                ids.add(task.id)
+        if new_tokens:
+            self.sorted_tokens = sorted(self.sorted_tokens + new_tokens)
+
+    def remove(self, task_id):
+        """Drop a task from the index"""
+        for token in self.task_tokens.pop(task_id, ()):
+            ids = self.postings[token]
+            ids.discard(task_id)
+            if not ids:
+                del self.postings[token]
+                del self.sorted_tokens[bisect_left(self.sorted_tokens, token)]
+
+    def update(self, task):
+        """Re-index a task whose description may have changed"""
+        if self.task_tokens.get(task.id) != set(tokenize(task.description)):
+            self.remove(task.id)
+            self.add(task)
+
+    def prefix_matches(self, prefix):
+        """Return the IDs of tasks with a token starting with prefix"""
+        ids = set()
+        position = bisect_left(self.sorted_tokens, prefix)
+        while position < len(self.sorted_tokens) and self.sorted_tokens[position].startswith(prefix):
+            ids |= self.postings[self.sorted_tokens[position]]
+            position += 1
+        return ids
+
+    def search(self, query):
+        """Return the IDs of tasks matching every word of the query as a prefix
+
+        Returns None for an empty query, meaning no text filter applies.
+        """
+        words = tokenize(query)
+        if not words:
+            return None
+
+        # Intersect starting with the most selective word
+        matches = sorted((self.prefix_matches(word) for word in set(words)), key=len)
+        result = matches[0]
+        for ids in matches[1:]:
+            if not result:
+                break
+            result = result & ids
+        return result
@@ -0,0 +1,34 @@
+# startup_profiler.py - Phase-by-phase timing of application startup
+
+import sys
+import time
+
+class StartupProfiler:
+    def __init__(self, enabled=False):
+        """Start timing; marks are only recorded when enabled"""
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.phases = []
+        self.reported = False
+    
+    def mark(self, phase):
+        """Record the time spent since the previous mark under a phase name"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last, now - self.start))
+        self.last = now
+    
+    def report(self, stream=None):
+        """Print the timing breakdown once"""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        stream = stream or sys.stdout
+        
+        print("Startup profile:", file=stream)
+        print(f"  {'phase':<32}{'took (ms)':>12}{'total (ms)':>12}", file=stream)
+        for phase, took, total in self.phases:
+            print(f"  {phase:<32}{took * 1000:>12.1f}{total * 1000:>12.1f}", file=stream)
+        stream.flush()
@@ -0,0 +1,753 @@
+# storage.py - Storage backends used by the task manager for persistence
+
+import json
+import os
+import threading
+import time
+
+from file_lock import FileLock
+
+# Sort rank of each priority; unknown priorities sort like "medium"
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """Yield the objects of a JSON array from an open file, one at a time
+
+    Only a chunk of the file is held in memory at once, so huge files can
+    be parsed without reading them whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+
+    while True:
+        # Skip whitespace and separators between items
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+
+        if position >= len(buffer):
+            buffer = f.read(chunk_size)
+            position = 0
+            if not buffer:
+                raise ValueError("Unexpected end of JSON array")
+            continue
+
+        if not started:
+            if buffer[position] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            position += 1
+            continue
+
+        if buffer[position] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            # The item continues in the next chunk
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+
+        yield item
+        position = end
+
+        # Drop the parsed part of the buffer now and then
+        if position > chunk_size:
+            buffer = buffer[position:]
+            position = 0
+
+
+def iter_batches(items, batch_size):
+    """Group an iterable into lists of at most batch_size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class FieldPatch(dict):
+    """Fields set on a task that is not in the mapping (see apply_records)"""
+
+
+def apply_fields(task, fields):
+    """Return a copy of a task dict with fields set; None values are removed"""
+    task = dict(task)
+    for key, value in fields.items():
+        if value is None:
+            task.pop(key, None)
+        else:
+            task[key] = value
+    return task
+
+
+def apply_records(tasks, records, keep_deletions=False):
+    """Apply change records to an ordered id->task mapping
+
+    Records are {"op": "put", "task": task} for a whole task,
+    {"op": "set", "id": id, "fields": fields} for the fields one change
+    touched, so edits of other fields made meanwhile by another process
+    are kept, and {"op": "del", "ids": ids}. Setting fields of a deleted
+    task does nothing.
+
+    With keep_deletions, deleted IDs are kept in the mapping as None, and
+    fields set on tasks not in the mapping are kept as a FieldPatch for
+    the caller to apply to the task later.
+    """
+    for record in records:
+        if record["op"] == "put":
+            tasks[record["task"]["id"]] = record["task"]
+        elif record["op"] == "set":
+            task_id = record["id"]
+            current = tasks.get(task_id)
+            if isinstance(current, FieldPatch):
+                current.update(record["fields"])
+            elif current is not None:
+                tasks[task_id] = apply_fields(current, record["fields"])
+            elif keep_deletions and task_id not in tasks:
+                tasks[task_id] = FieldPatch(record["fields"])
+        elif record["op"] == "del":
+            for task_id in record["ids"]:
+                if keep_deletions:
+                    tasks[task_id] = None
+                else:
+                    tasks.pop(task_id, None)
+
+
+def key_tasks(tasks):
+    """Return an ordered id->task mapping of a task list
+
+    Legacy tasks may lack an ID or share one; they are kept under unique
+    placeholder keys so the task manager can assign fresh IDs.
+    """
+    keyed = {}
+    for position, task in enumerate(tasks):
+        key = task.get("id")
+        if key is None or key in keyed:
+            key = ("legacy", position)
+        keyed[key] = task
+    return keyed
+
+
+class JsonStorage:
+    """Stores the whole task list as a single JSON file
+
+    Writes hold a lock file shared by all processes using the task file
+    and bump the version stamp kept in a small .meta sidecar. If another
+    process wrote since this one last read, a write merges its changes
+    into what is on disk instead of overwriting it.
+    """
+
+    # Whether append() needs the complete task list to persist a change
+    rewrites_on_change = True
+
+    def __init__(self, tasks_file):
+        self.tasks_file = tasks_file
+        self.meta_file = tasks_file + ".meta"
+
+        # Held while reading or writing the files, across processes
+        self.lock = FileLock(tasks_file + ".lock")
+
+        # Version stamp of the stored data last read or written by this
+        # instance; None until the tasks have been loaded
+        self.version = None
+
+        # Create the task data file if it doesn't exist
+        with self.lock:
+            if not os.path.exists(self.tasks_file):
+                with open(self.tasks_file, "w") as f:
+                    json.dump([], f)
+
+    def read_version(self):
+        """Return the current version stamp of the stored data"""
+        return self.read_meta()["version"]
+
+    def read_meta(self):
+        """Return the contents of the meta sidecar"""
+        meta = {"version": 0}
+        try:
+            with open(self.meta_file, "r") as f:
+                meta.update(json.load(f))
+        except (OSError, ValueError):
+            # No sidecar yet (or a damaged one): treat it as a fresh start
+            pass
+        return meta
+
+    def _write_meta(self, meta):
+        """Replace the meta sidecar; the caller holds the lock"""
+        temp_file = self.meta_file + ".tmp"
+        with open(temp_file, "w") as f:
+            json.dump(meta, f)
+        os.replace(temp_file, self.meta_file)
+
+    def _commit_version(self, meta):
+        """Bump the version stamp after a write; the caller holds the lock
+
+        If this instance was up to date it stays so. Otherwise the version
+        it knows is left alone, so the change watcher still loads what the
+        other process wrote.
+        """
+        in_sync = meta["version"] == self.version
+        meta["version"] += 1
+        self._write_meta(meta)
+        if in_sync:
+            self.version = meta["version"]
+
+    def reserve_ids(self, count, minimum=1):
+        """Reserve count numeric task IDs no other process will hand out
+
+        Returns the first ID of the block, which is at least minimum. A
+        task file written before IDs were reserved is scanned once for its
+        highest ID, since tasks not loaded yet must not be given out again.
+        """
+        with self.lock:
+            meta = self.read_meta()
+            if "next_id" not in meta:
+                numeric_ids = [int(task["id"]) for task in self._read_tasks() if str(task.get("id", "")).isdigit()]
+                meta["next_id"] = max(numeric_ids, default=0) + 1
+            start = max(meta["next_id"], minimum)
+            meta["next_id"] = start + count
+            self._write_meta(meta)
+        return start
+
+    def read_state(self):
+        """Return the version stamp and the stored tasks, read together"""
+        with self.lock:
+            return self.read_version(), self._read_tasks()
+
+    def load(self):
+        """Load and return the list of stored tasks"""
+        self.version, tasks = self.read_state()
+        return tasks
+
+    def iter_load(self, batch_size):
+        """Yield the stored tasks in lists of at most batch_size"""
+        # Snapshots are replaced by renaming, so the open file stays whole
+        with self.lock:
+            self.version = self.read_version()
+            f = open(self.tasks_file, "r")
+        with f:
+            yield from iter_batches(iter_json_array(f), batch_size)
+
+    def save(self, tasks):
+        """Write the complete task list to disk; return False if out of date
+
+        If another process wrote in the meantime, the list does not hold
+        its changes, so nothing is written; writing it would bring back
+        tasks the other process deleted and undo its edits.
+        """
+        with self.lock:
+            meta = self.read_meta()
+            if meta["version"] != self.version:
+                return False
+            self._write_snapshot(tasks)
+            self._commit_version(meta)
+        return True
+
+    def append(self, records, tasks):
+        """Persist a batch of change records
+
+        The plain JSON file has no journal, so every change rewrites the
+        list. If another process wrote in the meantime, or tasks is None
+        because the caller does not hold the complete list (e.g. while it
+        is still loading), the records are applied to the stored tasks
+        instead.
+        """
+        with self.lock:
+            meta = self.read_meta()
+            if tasks is None or meta["version"] != self.version:
+                stored = key_tasks(self._read_tasks())
+                apply_records(stored, records)
+                tasks = stored.values()
+            self._write_snapshot(tasks)
+            self._commit_version(meta)
+
+    def flush(self):
+        """Make sure all written data has reached the disk"""
+        pass
+
+    def close(self):
+        """Flush outstanding data and release any resources"""
+        self.flush()
+        self.lock.close()
+
+    def _read_tasks(self):
+        """Read the task list from the snapshot"""
+        with open(self.tasks_file, "r") as f:
+            return json.load(f)
+
+    def _write_snapshot(self, tasks):
+        """Write the task list to a temp file and rename it over the snapshot"""
+        temp_file = self.tasks_file + ".tmp"
+        with open(temp_file, "w") as f:
+            json.dump(list(tasks), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.tasks_file)
+
+
+class JournalStorage(JsonStorage):
+    """Stores a JSON snapshot plus an append-only journal of changes
+
+    Each mutation appends one compact record to the journal instead of
+    rewriting the snapshot. Once the journal grows past a threshold it is
+    sealed and folded into a new snapshot on a background thread. Records
+    apply by task ID, so journals written by several processes merge.
+    """
+
+    rewrites_on_change = False
+
+    def __init__(self, tasks_file, compact_threshold=2000, fsync_interval=1.0):
+        super().__init__(tasks_file)
+        self.journal_file = tasks_file + ".journal"
+        self.sealed_file = tasks_file + ".journal.old"
+        self.compact_threshold = compact_threshold
+        self.fsync_interval = fsync_interval
+
+        self._journal = None
+        self._journal_records = 0
+        self._last_fsync = 0.0
+        self._unsynced = False
+        self._compaction_thread = None
+
+        # Finish a compaction that was interrupted by a crash or exit
+        if os.path.exists(self.sealed_file):
+            self._compact()
+
+    def load(self):
+        """Load the snapshot and replay the journal on top of it"""
+        tasks = super().load()
+        self._journal_records = self._count_records(self.journal_file)
+        return tasks
+
+    def iter_load(self, batch_size):
+        """Yield the stored tasks in lists of at most batch_size
+
+        The journals are small, so they are read up front; the snapshot is
+        then streamed with journaled changes applied to each task as it
+        passes, and tasks created in the journal follow at the end. A task is
+        never yielded twice, whatever is written while the caller consumes.
+        """
+        with self.lock:
+            self.version = self.read_version()
+            snapshot = open(self.tasks_file, "r")
+            changes = {}
+            self._replay(changes, self.sealed_file, keep_deletions=True)
+            self._replay(changes, self.journal_file, keep_deletions=True)
+            self._journal_records = self._count_records(self.journal_file)
+
+        with snapshot:
+            yield from iter_batches(self._iter_merged(snapshot, changes), batch_size)
+
+    def _iter_merged(self, snapshot, changes):
+        """Yield snapshot tasks with journaled changes applied"""
+        for task in iter_json_array(snapshot):
+            task_id = task.get("id")
+            if task_id in changes:
+                change = changes.pop(task_id)
+                if change is None:
+                    continue
+                task = apply_fields(task, change) if isinstance(change, FieldPatch) else change
+            yield task
+
+        # Tasks that only exist in the journal
+        for task in changes.values():
+            if task is not None and not isinstance(task, FieldPatch):
+                yield task
+
+    def save(self, tasks):
+        """Write a fresh snapshot and discard the journal
+
+        Like JsonStorage.save, nothing is written and False is returned if
+        another process wrote in the meantime.
+        """
+        self._wait_for_compaction()
+        with self.lock:
+            meta = self.read_meta()
+            if meta["version"] != self.version:
+                return False
+
+            self._close_journal()
+            self._write_snapshot(tasks)
+            for path in (self.sealed_file, self.journal_file):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._journal_records = 0
+            self._commit_version(meta)
+        return True
+
+    def append(self, records, tasks):
+        """Append a batch of change records to the journal"""
+        if not records:
+            return
+
+        with self.lock:
+            # Another process may have sealed the journal we have open
+            if self._journal is not None and self._journal_replaced():
+                self._close_journal()
+            if self._journal is None:
+                self._journal = self._open_journal()
+                self._journal_records = self._count_records(self.journal_file)
+
+            self._journal.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+            self._journal.flush()
+            self._journal_records += len(records)
+
+            # Batch fsync calls so a burst of clicks costs a single disk sync;
+            # the task manager calls flush() once appends stop coming
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                os.fsync(self._journal.fileno())
+                self._last_fsync = now
+            else:
+                self._unsynced = True
+
+            self._commit_version(self.read_meta())
+
+            if self._journal_records >= self.compact_threshold:
+                self._start_compaction()
+
+    def flush(self):
+        """Force journal records that were not synced yet to disk"""
+        if self._journal is not None and self._unsynced:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._last_fsync = time.monotonic()
+        self._unsynced = False
+
+    def close(self):
+        """Flush the journal and wait for a running compaction"""
+        self.flush()
+        self._close_journal()
+        self._wait_for_compaction()
+        self.lock.close()
+
+    def _start_compaction(self):
+        """Seal the active journal and fold it into the snapshot in the background"""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+
+        # Another process sealed a journal that it is still folding in
+        if os.path.exists(self.sealed_file):
+            return
+
+        # Seal the current journal; new records go to a fresh file
+        self.flush()
+        self._close_journal()
+        os.replace(self.journal_file, self.sealed_file)
+        self._journal_records = 0
+
+        self._compaction_thread = threading.Thread(target=self._compact, daemon=True)
+        self._compaction_thread.start()
+
+    def _compact(self):
+        """Merge the sealed journal into a new snapshot"""
+        with self.lock:
+            # Another process may have finished the job already
+            if not os.path.exists(self.sealed_file):
+                return
+
+            tasks = key_tasks(super()._read_tasks())
+            self._replay(tasks, self.sealed_file)
+            self._write_snapshot(list(tasks.values()))
+
+            # Replaying records twice is harmless, so a crash before this
+            # line leaves the data intact
+            os.remove(self.sealed_file)
+
+    def _wait_for_compaction(self):
+        """Block until a running compaction has finished"""
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+            self._compaction_thread = None
+
+    def _open_journal(self):
+        """Open the active journal for appending"""
+        journal = open(self.journal_file, "a+")
+
+        # Terminate a torn last line so the next record starts cleanly
+        if journal.tell() > 0:
+            journal.seek(journal.tell() - 1)
+            if journal.read(1) != "\n":
+                journal.write("\n")
+        return journal
+
+    def _journal_replaced(self):
+        """Check whether the open journal is no longer the active journal file"""
+        try:
+            return os.fstat(self._journal.fileno()).st_ino != os.stat(self.journal_file).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _close_journal(self):
+        """Close the active journal file handle"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _read_tasks(self):
+        """Return the task list from the snapshot and all journal files"""
+        return list(self._read_keyed().values())
+
+    def _read_keyed(self):
+        """Return the snapshot and journals as an ordered id->task mapping"""
+        with self.lock:
+            tasks = key_tasks(super()._read_tasks())
+            self._replay(tasks, self.sealed_file)
+            self._replay(tasks, self.journal_file)
+        return tasks
+
+    def _replay(self, tasks, path, keep_deletions=False):
+        """Apply the records of a journal file to an id->task mapping
+
+        With keep_deletions, deleted IDs are kept in the mapping as None.
+        """
+        if not os.path.exists(path):
+            return
+
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Skip a record torn by a crash in the middle of a write
+                    continue
+                apply_records(tasks, [record], keep_deletions)
+
+    def _count_records(self, path):
+        """Count the records in a journal file"""
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r") as f:
+            return sum(1 for _ in f)
+
+
+class SqliteStorage:
+    """Stores tasks in a SQLite table keyed by task ID
+
+    Each change is an upsert or delete of single rows, and the rowid keeps
+    the order tasks were added in. A row is just the ID and the task as
+    JSON: sorting and statistics are kept in memory by the task manager,
+    so nothing queries the fields. The version stamp lives in the meta
+    table and is bumped in the same transaction as every write.
+    """
+
+    rewrites_on_change = False
+
+    # Insert a task or update it in place, keeping its rowid (display order)
+    UPSERT = "INSERT INTO tasks (id, data) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET data = excluded.data"
+
+    # Columns of older databases, from when sorting and statistics were queried
+    QUERY_COLUMNS = ("description", "priority", "priority_rank", "date_created", "completed")
+
+    def __init__(self, tasks_file, db_file=None):
+        # Imported here so the other engines don't pay for loading sqlite3
+        import sqlite3
+
+        self.tasks_file = tasks_file
+        self.db_file = db_file or os.path.splitext(tasks_file)[0] + ".db"
+
+        # SQLite locks the database between processes itself; this lock
+        # keeps the threads of this process off the shared connection
+        self.lock = FileLock(self.db_file + ".lock")
+        self.version = None
+
+        # Writes come from the save worker thread, reads from the UI thread
+        self.connection = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.create_schema()
+
+        # Version checks from the UI thread use their own connection
+        self._version_reader = sqlite3.connect(self.db_file, check_same_thread=False)
+
+        # Bring over the tasks of an existing JSON file the first time
+        if self.get_meta("imported_json") is None:
+            self.import_json(self.tasks_file)
+
+    def create_schema(self):
+        """Create the tables if they don't exist"""
+        import sqlite3
+
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS tasks (id TEXT PRIMARY KEY, data TEXT)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+            # Sorting and statistics indexes and columns of older databases
+            # only slow down writes
+            self.connection.execute("DROP INDEX IF EXISTS idx_tasks_status")
+            self.connection.execute("DROP INDEX IF EXISTS idx_tasks_created")
+            columns = {row[1] for row in self.connection.execute("PRAGMA table_info(tasks)")}
+            for column in self.QUERY_COLUMNS:
+                if column in columns:
+                    try:
+                        self.connection.execute(f"ALTER TABLE tasks DROP COLUMN {column}")
+                    except sqlite3.OperationalError:
+                        # SQLite before 3.35 can't drop columns; they stay unused
+                        break
+
+    def get_meta(self, key, connection=None):
+        """Return a value from the meta table, or None"""
+        connection = connection or self.connection
+        row = connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        """Store a value in the meta table"""
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def read_version(self):
+        """Return the current version stamp of the stored data"""
+        return int(self.get_meta("version", self._version_reader) or 0)
+
+    def _begin_write(self):
+        """Start a write transaction and return the stored version stamp"""
+        self.connection.execute("BEGIN IMMEDIATE")
+        return int(self.get_meta("version") or 0)
+
+    def _commit_version(self, version):
+        """Bump the version stamp inside the write transaction
+
+        As with the JSON engines, an instance that was not up to date keeps
+        its old version so the change watcher still picks up the new data.
+        """
+        self.set_meta("version", version + 1)
+        if version == self.version:
+            self.version = version + 1
+
+    def reserve_ids(self, count, minimum=1):
+        """Reserve count numeric task IDs no other process will hand out"""
+        with self.lock, self.connection:
+            self._begin_write()
+            start = max(int(self.get_meta("next_id") or 1), minimum)
+            self.set_meta("next_id", start + count)
+        return start
+
+    def import_json(self, path):
+        """Import the tasks of a JSON file in a single transaction"""
+        tasks = []
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                tasks = json.load(f)
+        keyed = key_tasks(tasks)
+
+        with self.lock, self.connection:
+            version = self._begin_write()
+
+            # Missing and duplicate IDs get fresh ones from the ID counter,
+            # past every numeric ID in the file, as TaskManager.upgrade_task does
+            next_id = int(self.get_meta("next_id") or 1)
+            for key in keyed:
+                if isinstance(key, str) and key.isdigit():
+                    next_id = max(next_id, int(key) + 1)
+            for key, task in keyed.items():
+                if isinstance(key, tuple):
+                    task["id"] = str(next_id)
+                    next_id += 1
+            self.set_meta("next_id", next_id)
+
+            self.connection.executemany(self.UPSERT, [self._row(task) for task in keyed.values()])
+            self.set_meta("imported_json", path)
+            self._commit_version(version)
+
+    def read_state(self):
+        """Return the version stamp and the stored tasks, read together"""
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN")
+            version = int(self.get_meta("version") or 0)
+            rows = self.connection.execute("SELECT data FROM tasks ORDER BY rowid")
+            return version, [json.loads(data) for (data,) in rows]
+
+    def load(self):
+        """Load and return all tasks in insertion order"""
+        self.version, tasks = self.read_state()
+        return tasks
+
+    def iter_load(self, batch_size):
+        """Yield the stored tasks in lists of at most batch_size
+
+        A separate connection reads inside one transaction, so writes made
+        by the save worker meanwhile don't disturb the iteration.
+        """
+        import sqlite3
+
+        reader = sqlite3.connect(self.db_file)
+        try:
+            reader.execute("BEGIN")
+            self.version = int(self.get_meta("version", reader) or 0)
+            cursor = reader.execute("SELECT data FROM tasks ORDER BY rowid")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [json.loads(data) for (data,) in rows]
+        finally:
+            reader.close()
+
+    def save(self, tasks):
+        """Replace the stored tasks with the given list
+
+        Like JsonStorage.save, nothing is written and False is returned if
+        another process wrote in the meantime.
+        """
+        with self.lock, self.connection:
+            version = self._begin_write()
+            if version != self.version:
+                return False
+            self.connection.execute("DELETE FROM tasks")
+            self.connection.executemany(self.UPSERT, [self._row(task) for task in tasks])
+            self._commit_version(version)
+        return True
+
+    def append(self, records, tasks):
+        """Apply a batch of change records in one transaction"""
+        with self.lock, self.connection:
+            version = self._begin_write()
+            for record in records:
+                if record["op"] == "put":
+                    self.connection.execute(self.UPSERT, self._row(record["task"]))
+                elif record["op"] == "set":
+                    row = self.connection.execute("SELECT data FROM tasks WHERE id = ?", (record["id"],)).fetchone()
+                    if row is not None:
+                        task = apply_fields(json.loads(row[0]), record["fields"])
+                        self.connection.execute(self.UPSERT, self._row(task))
+                elif record["op"] == "del":
+                    self.connection.executemany("DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in record["ids"]])
+            self._commit_version(version)
+
+    def flush(self):
+        """Checkpoint the write-ahead log into the database file"""
+        with self.lock:
+            self.connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self):
+        """Checkpoint and close the database connections"""
+        self.flush()
+        self.connection.close()
+        self._version_reader.close()
+        self.lock.close()
+
+    def _row(self, task):
+        """Convert a task dict into a row for the tasks table"""
+        return (task["id"], json.dumps(task, separators=(",", ":")))
+
+
+def create_storage(tasks_file, engine="journal"):
+    """Create the storage backend for an engine name"""
+    if engine == "json":
+        return JsonStorage(tasks_file)
+    if engine == "journal":
+        return JournalStorage(tasks_file)
+    if engine == "sqlite":
+        return SqliteStorage(tasks_file)
+    raise ValueError(f"Unknown storage engine: {engine}")
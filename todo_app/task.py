@@ -0,0 +1,133 @@
+# task.py - Compact task record used throughout the application
+
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+
+# Format of dates in the task file and the task list
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+class Task:
+    """A single task
+
+    Uses __slots__ instead of a per-task dict, keeps the creation time as an
+    integer timestamp and interns the priority so every task shares the
+    same few priority strings. Keys of the task file that are not known
+    here are kept in extra so they survive a load/save round trip.
+    """
+
+    __slots__ = ("id", "description", "priority", "created", "completed", "due", "completed_at", "parent", "extra")
+
+    def __init__(self, id, description, priority="medium", created=None, completed=False, due=None,
+                 completed_at=None, parent=None, extra=None):
+        self.id = id
+        self.description = description
+        self.priority = sys.intern(priority)
+        # The task file stores minutes, so new tasks start on a whole minute
+        self.created = int(time.time()) // 60 * 60 if created is None else created
+        self.completed = completed
+        # Due time as an integer timestamp, or None
+        self.due = due
+        # When the task was last marked completed, or None
+        self.completed_at = completed_at
+        # ID of the project or task this one is a subtask of, or None
+        self.parent = parent
+        self.extra = extra
+
+    def __repr__(self):
+        return f"Task(id={self.id!r}, description={self.description!r}, priority={self.priority!r}, completed={self.completed!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Task):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    @property
+    def date_created(self):
+        """Creation time formatted like in the task file"""
+        return format_timestamp(self.created)
+
+    @property
+    def due_date(self):
+        """Due time formatted like in the task file, or an empty string"""
+        return "" if self.due is None else format_timestamp(self.due)
+
+    def set_fields(self, fields):
+        """Set attributes from a dict of field names and values"""
+        for name, value in fields.items():
+            if name == "priority":
+                value = sys.intern(value)
+            setattr(self, name, value)
+
+    def to_dict(self):
+        """Convert the task into a dict for the task file"""
+        data = {
+            "description": self.description,
+            "priority": self.priority,
+            "date_created": self.date_created,
+            "completed": self.completed,
+            "id": self.id
+        }
+        if self.due is not None:
+            data["due"] = self.due_date
+        if self.completed_at is not None:
+            data["completed_at"] = format_timestamp(self.completed_at)
+        if self.parent is not None:
+            data["parent"] = self.parent
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def file_fields(self, names):
+        """Return the task file values behind some attributes, for a "set" record
+
+        Unset values are None, which removes the key from the stored task.
+        """
+        data = self.to_dict()
+        keys = [FILE_KEY_OF_ATTRIBUTE.get(name, name) for name in names]
+        return {key: data.get(key) for key in keys}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a task from a dict of the task file
+
+        The dict must already have every field (see TaskManager.upgrade_task).
+        """
+        extra = {key: value for key, value in data.items() if key not in TASK_FILE_KEYS}
+        return cls(
+            data["id"],
+            data["description"],
+            data["priority"],
+            parse_timestamp(data["date_created"]),
+            bool(data["completed"]),
+            parse_timestamp(data["due"]) if data.get("due") else None,
+            parse_timestamp(data["completed_at"]) if data.get("completed_at") else None,
+            data.get("parent"),
+            extra or None
+        )
+
+
+# Keys of the task file that map onto Task attributes
+TASK_FILE_KEYS = ("description", "priority", "date_created", "completed", "id", "due", "completed_at", "parent")
+
+# Task file keys of the attributes whose names differ from them
+FILE_KEY_OF_ATTRIBUTE = {"created": "date_created"}
+
+
+@lru_cache(maxsize=4096)
+def format_timestamp(timestamp):
+    """Format an integer timestamp as a task file date
+
+    Dates have minute precision, so many tasks share a cached result.
+    """
+    return datetime.fromtimestamp(timestamp).strftime(DATE_FORMAT)
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp(text):
+    """Parse a task file date into an integer timestamp
+
+    Cached like format_timestamp; imports and loads repeat the same dates.
+    """
+    return int(datetime.strptime(text, DATE_FORMAT).timestamp())
@@ -0,0 +1,199 @@
+# task_analytics.py - Daily created/completed counts kept up to date per change, and those of deleted tasks
+
+import copy
+import json
+import os
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+from file_lock import FileLock
+
+# Upper bounds in seconds of the time-to-complete histogram bins, from 15
+# minutes doubling up to about half a year; a last bin holds anything longer
+DURATION_BOUNDS = tuple(900 << shift for shift in range(15))
+
+
+@lru_cache(maxsize=4096)
+def day_of(timestamp):
+    """Return the local calendar day of a timestamp as "YYYY-MM-DD" """
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+
+def format_duration(seconds):
+    """Format a number of seconds as minutes, hours or days"""
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    if seconds < 2 * 86400:
+        return f"{seconds / 3600:.1f} hours"
+    return f"{seconds / 86400:.1f} days"
+
+
+class DailyAggregates:
+    """Counts of created and completed tasks per day
+
+    days maps "YYYY-MM-DD" to a bucket of plain dicts and lists, so it can
+    be stored as JSON:
+
+        {"created": {priority: count}, "completed": {priority: count},
+         "durations": [count per DURATION_BOUNDS bin]}
+
+    A task counts as created on the day it was created and, while it is
+    completed with a known completion time, as completed on that day with
+    its time to complete in the histogram. Like the statistics counters,
+    tasks are added and removed one at a time, so the buckets never need
+    a pass over all tasks.
+    """
+
+    def __init__(self, days=None):
+        self.days = {} if days is None else days
+
+    def bucket(self, day):
+        """Return the bucket of a day, creating an empty one if needed"""
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = {
+                "created": {},
+                "completed": {},
+                "durations": [0] * (len(DURATION_BOUNDS) + 1)
+            }
+        return bucket
+
+    def count(self, task, delta):
+        """Add (delta=1) or remove (delta=-1) a task from the buckets"""
+        created = self.bucket(day_of(task.created))["created"]
+        created[task.priority] = created.get(task.priority, 0) + delta
+
+        if task.completed and task.completed_at is not None:
+            bucket = self.bucket(day_of(task.completed_at))
+            completed = bucket["completed"]
+            completed[task.priority] = completed.get(task.priority, 0) + delta
+            duration = max(0, task.completed_at - task.created)
+            bucket["durations"][bisect_left(DURATION_BOUNDS, duration)] += delta
+
+    def add_days(self, days):
+        """Add the counts of another days mapping, day by day"""
+        for day, bucket in days.items():
+            self.add_bucket(day, bucket)
+
+    def add_bucket(self, day, other):
+        """Add the counts of another bucket to a day"""
+        bucket = self.bucket(day)
+        for key in ("created", "completed"):
+            counts = bucket[key]
+            for priority, count in other[key].items():
+                counts[priority] = counts.get(priority, 0) + count
+        bucket["durations"] = [a + b for a, b in zip(bucket["durations"], other["durations"])]
+
+    def created_on(self, day):
+        """Return the number of tasks created on a day"""
+        bucket = self.days.get(day)
+        return sum(bucket["created"].values()) if bucket else 0
+
+    def completed_on(self, day):
+        """Return the number of tasks completed on a day"""
+        bucket = self.days.get(day)
+        return sum(bucket["completed"].values()) if bucket else 0
+
+    def by_priority(self, key):
+        """Return the "created" or "completed" counts per priority over all days"""
+        totals = {}
+        for bucket in self.days.values():
+            for priority, count in bucket[key].items():
+                totals[priority] = totals.get(priority, 0) + count
+        return {priority: count for priority, count in totals.items() if count}
+
+    def median_duration(self):
+        """Estimate the median time to complete in seconds, or None
+
+        Interpolates within the histogram bin holding the median, so the
+        estimate is exact to within that bin.
+        """
+        histogram = [0] * (len(DURATION_BOUNDS) + 1)
+        for bucket in self.days.values():
+            histogram = [a + b for a, b in zip(histogram, bucket["durations"])]
+
+        half = sum(histogram) / 2
+        if not half:
+            return None
+        seen = 0
+        for index, count in enumerate(histogram):
+            if count > 0 and seen + count >= half:
+                low = DURATION_BOUNDS[index - 1] if index else 0
+                high = DURATION_BOUNDS[index] if index < len(DURATION_BOUNDS) else 2 * low
+                return low + (high - low) * (half - seen) / count
+            seen += count
+        return None
+
+
+def combine_days(day_maps, days):
+    """Sum the buckets of several days mappings over the given days"""
+    combined = DailyAggregates()
+    for day in days:
+        for day_map in day_maps:
+            bucket = day_map.get(day)
+            if bucket is not None:
+                combined.add_bucket(day, bucket)
+    return combined
+
+
+class DailyHistory:
+    """Daily buckets of deleted tasks, kept in tasks_file + ".daily"
+
+    Deleting a task takes it out of the loaded tasks but not out of the
+    history it made: its buckets are added here, so the analytics sum the
+    loaded tasks, this file and the archive summary. Undoing the deletion
+    subtracts them again. The file is small (one bucket per day) and is
+    replaced atomically under its own lock, so several instances can add
+    to it.
+    """
+
+    def __init__(self, tasks_file):
+        self.daily_file = tasks_file + ".daily"
+        self.lock = FileLock(self.daily_file + ".lock")
+
+        # Cached days and the (mtime, size) of the file they came from
+        self._days = {}
+        self._stamp = None
+
+    def days(self):
+        """Return the stored days, re-reading them only if another writer replaced them"""
+        try:
+            stat = os.stat(self.daily_file)
+        except OSError:
+            self._days, self._stamp = {}, None
+            return self._days
+
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            try:
+                with open(self.daily_file, "r") as f:
+                    self._days = json.load(f)
+            except (OSError, ValueError):
+                # Caught mid-replace; the previous days are still valid
+                return self._days
+            self._stamp = stamp
+        return self._days
+
+    def add(self, aggregates):
+        """Add the buckets of a DailyAggregates to the stored days"""
+        if not aggregates.days:
+            return
+
+        with self.lock:
+            # Re-read under the lock; another process may have added
+            self._stamp = None
+            stored = DailyAggregates(copy.deepcopy(self.days()))
+            stored.add_days(aggregates.days)
+
+            temp_file = self.daily_file + ".tmp"
+            with open(temp_file, "w") as f:
+                json.dump(stored.days, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.daily_file)
+            self._stamp = None
+
+    def close(self):
+        """Release the lock file"""
+        self.lock.close()
@@ -0,0 +1,182 @@
+# task_archive.py - Cold store for old completed tasks, read one page at a time
+
+import json
+import os
+
+from file_lock import FileLock
+from task import Task
+from task_analytics import DailyAggregates
+
+# Tasks per page of the archive view; the summary keeps one offset per page
+PAGE_SIZE = 100
+
+# Task IDs of the newest append kept in the summary (see TaskManager.archive_completed)
+LAST_IDS_LIMIT = 10000
+
+
+class TaskArchive:
+    """Append-only archive of tasks that left the working set
+
+    Tasks are stored one JSON object per line in tasks_file + ".archive",
+    which the task manager never reads at startup. A small summary file
+    next to it holds the task count, counts per priority, the byte offset
+    of every page and the daily buckets of task_analytics, so counting is
+    a single read and a page is one seek, however large the archive grows.
+
+    The summary is replaced atomically after the lines are on disk. Lines
+    it does not cover yet (from a crash mid-write) are cut off before the
+    next write, so readers only ever see whole, counted pages.
+    """
+
+    def __init__(self, tasks_file):
+        self.archive_file = tasks_file + ".archive"
+        self.summary_file = self.archive_file + ".summary"
+
+        # Held while appending, across processes
+        self.lock = FileLock(self.archive_file + ".lock")
+
+        # Cached summary and the (mtime, size) of the file it came from
+        self._summary = None
+        self._summary_stamp = None
+
+    def empty_summary(self):
+        """Return the summary of an archive with no tasks"""
+        return {"count": 0, "size": 0, "by_priority": {}, "pages": [], "last_ids": [], "days": {}}
+
+    def summary(self):
+        """Return the summary, re-reading it only if another writer replaced it"""
+        try:
+            stat = os.stat(self.summary_file)
+        except OSError:
+            stat = None
+
+        if stat is None:
+            # No summary: either nothing was archived yet or it was lost
+            if os.path.exists(self.archive_file) and os.path.getsize(self.archive_file):
+                with self.lock:
+                    self._summary = self._rebuild_summary()
+                    self._write_summary(self._summary)
+                return self.summary()
+            self._summary, self._summary_stamp = self.empty_summary(), None
+            return self._summary
+
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._summary_stamp:
+            summary = self.empty_summary()
+            try:
+                with open(self.summary_file, "r") as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                # Caught mid-replace; the previous summary is still valid
+                return self._summary or summary
+            if stored.get("count") and "days" not in stored:
+                # Written before daily buckets were kept; count them once
+                with self.lock:
+                    rebuilt = self._rebuild_summary()
+                    rebuilt["last_ids"] = stored.get("last_ids", [])
+                    self._write_summary(rebuilt)
+                return self.summary()
+            summary.update(stored)
+            self._summary, self._summary_stamp = summary, stamp
+        return self._summary
+
+    def count(self):
+        """Return the number of archived tasks"""
+        return self.summary()["count"]
+
+    def page_count(self):
+        """Return the number of pages of PAGE_SIZE tasks"""
+        return len(self.summary()["pages"])
+
+    def recent_ids(self):
+        """Return the IDs of the tasks added by the newest append()"""
+        return set(self.summary()["last_ids"])
+
+    def append(self, tasks):
+        """Add tasks to the end of the archive"""
+        if not tasks:
+            return
+
+        with self.lock:
+            # Re-read under the lock; another process may have appended
+            self._summary_stamp = None
+            summary = self.summary()
+
+            with open(self.archive_file, "ab") as f:
+                # Drop lines a crashed writer left outside the summary
+                f.truncate(summary["size"])
+
+                offset = summary["size"]
+                pages = summary["pages"]
+                by_priority = summary["by_priority"]
+                aggregates = DailyAggregates(summary["days"])
+                for position, task in enumerate(tasks, summary["count"]):
+                    if position % PAGE_SIZE == 0:
+                        pages.append(offset)
+                    line = (json.dumps(task.to_dict()) + "\n").encode("utf-8")
+                    f.write(line)
+                    offset += len(line)
+                    by_priority[task.priority] = by_priority.get(task.priority, 0) + 1
+                    aggregates.count(task, 1)
+
+                f.flush()
+                os.fsync(f.fileno())
+
+            summary["count"] += len(tasks)
+            summary["size"] = offset
+            summary["last_ids"] = [task.id for task in tasks[-LAST_IDS_LIMIT:]]
+            self._write_summary(summary)
+
+    def read_page(self, page):
+        """Return the tasks on a page, oldest first; page 0 is the oldest"""
+        summary = self.summary()
+        pages = summary["pages"]
+        if not 0 <= page < len(pages):
+            return []
+
+        start = pages[page]
+        end = pages[page + 1] if page + 1 < len(pages) else summary["size"]
+        with open(self.archive_file, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+        return [Task.from_dict(json.loads(line)) for line in data.splitlines() if line.strip()]
+
+    def close(self):
+        """Release the lock file"""
+        self.lock.close()
+
+    def _write_summary(self, summary):
+        """Replace the summary file; the caller holds the lock"""
+        temp_file = self.summary_file + ".tmp"
+        with open(temp_file, "w") as f:
+            json.dump(summary, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.summary_file)
+        self._summary_stamp = None
+
+    def _rebuild_summary(self):
+        """Recount the archive file when its summary is missing"""
+        summary = self.empty_summary()
+        aggregates = DailyAggregates(summary["days"])
+        offset = 0
+        with open(self.archive_file, "rb") as f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    # A torn last line; append() cuts it off
+                    break
+                if summary["count"] % PAGE_SIZE == 0:
+                    summary["pages"].append(offset)
+                offset += len(line)
+                summary["count"] += 1
+                priority = data.get("priority", "medium")
+                summary["by_priority"][priority] = summary["by_priority"].get(priority, 0) + 1
+                try:
+                    aggregates.count(Task.from_dict(data), 1)
+                except (KeyError, TypeError, ValueError):
+                    # Not written by this application; counted but not dated
+                    pass
+        summary["size"] = offset
+        return summary
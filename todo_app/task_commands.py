@@ -0,0 +1,76 @@
+# task_commands.py - Task commands shared by the command line and the IPC server
+
+# Commands are plain dicts such as {"command": "add", "tasks": [...]} and
+# results are dicts that json.dumps can write, so the same request works
+# on a local TaskManager and on a running instance over the IPC socket.
+
+
+def add_command(task_manager, request):
+    """Add tasks given as {"description", "priority", "due"} dicts"""
+    items = []
+    for task in request.get("tasks", []):
+        if not isinstance(task, dict):
+            raise ValueError("Tasks must be objects with a description")
+        items.append((str(task.get("description", "")), task.get("priority") or "medium", task.get("due") or ""))
+
+    for _, priority, _ in items:
+        if priority not in ("high", "medium", "low"):
+            raise ValueError(f"Unknown priority: {priority}")
+
+    # One transaction, so a running window applies the batch as one change
+    with task_manager.transaction():
+        ids = task_manager.add_tasks(items)
+    return {"ids": ids}
+
+
+def list_command(task_manager, request):
+    """Return matching tasks in display order"""
+    tasks = task_manager.search_tasks(
+        request.get("text", ""),
+        priority=request.get("priority"),
+        status=request.get("status")
+    )
+    return {"tasks": [task.to_dict() for task in tasks]}
+
+
+def complete_command(task_manager, request):
+    """Mark tasks as completed"""
+    return {"ids": task_manager.update_tasks(request_ids(request), completed=True)}
+
+
+def delete_command(task_manager, request):
+    """Delete tasks"""
+    return {"ids": task_manager.delete_tasks(request_ids(request))}
+
+
+def export_command(task_manager, request):
+    """Return every task as stored in the task file"""
+    return {"tasks": [task.to_dict() for task in task_manager.tasks]}
+
+
+def request_ids(request):
+    """Return the task IDs of a request as strings"""
+    ids = request.get("ids", [])
+    if not isinstance(ids, list):
+        raise ValueError("ids must be a list")
+    return [str(task_id) for task_id in ids]
+
+
+COMMANDS = {
+    "add": add_command,
+    "list": list_command,
+    "complete": complete_command,
+    "delete": delete_command,
+    "export": export_command
+}
+
+
+def execute(task_manager, request):
+    """Run a command request and return its result
+
+    Raises ValueError (including TaskValidationError) for bad requests.
+    """
+    command = COMMANDS.get(request.get("command")) if isinstance(request, dict) else None
+    if command is None:
+        raise ValueError("Unknown command")
+    return command(task_manager, request)
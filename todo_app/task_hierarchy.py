@@ -0,0 +1,109 @@
+# task_hierarchy.py - Parent/child links between tasks with rolled-up progress
+
+class TaskHierarchy:
+    """Child index and done/total counts of every task's subtree
+
+    A task whose parent is unset or not loaded is a root, so deleting a
+    project shows its subtasks at the top level, and bringing it back
+    (e.g. by undo) puts them under it again. Rollups count the loaded
+    descendants of a task, itself excluded; every change adjusts only the
+    counts along the path to the root, so nothing is recounted.
+
+    lookup(task_id) returns a loaded task or None (TaskManager.get_task).
+    """
+
+    def __init__(self, lookup):
+        self.lookup = lookup
+
+        # Parent ID -> IDs of its loaded children; kept for missing parents
+        self.children = {}
+
+        # Task ID -> [done, total] over its loaded descendants
+        self.rollups = {}
+
+        self.root_count = 0
+
+    def clear(self):
+        """Forget all tasks"""
+        self.children = {}
+        self.rollups = {}
+        self.root_count = 0
+
+    def is_root(self, task):
+        """Check whether a task is shown at the top level"""
+        return task.parent is None or self.lookup(task.parent) is None
+
+    def has_children(self, task_id):
+        """Check whether any loaded task has this one as its parent"""
+        return bool(self.children.get(task_id))
+
+    def rollup(self, task_id):
+        """Return (done, total) over the loaded descendants of a task"""
+        done, total = self.rollups.get(task_id, (0, 0))
+        return done, total
+
+    def would_cycle(self, task_id, parent_id):
+        """Check whether making parent_id the parent of task_id forms a loop"""
+        seen = set()
+        while parent_id is not None and parent_id not in seen:
+            if parent_id == task_id:
+                return True
+            seen.add(parent_id)
+            parent = self.lookup(parent_id)
+            parent_id = parent.parent if parent is not None else None
+        return False
+
+    def add(self, task):
+        """Link a task that was just put into the index
+
+        To change a task's parent or completion status, remove() it with
+        the old values and add() it again with the new ones. A parent that
+        would make the task its own ancestor (from a hand-edited file or
+        edits merged from two instances) is dropped.
+        """
+        if task.parent is not None and self.would_cycle(task.id, task.parent):
+            task.parent = None
+
+        # Children waiting for this task stop being roots
+        self.root_count += (1 if self.is_root(task) else 0) - len(self.children.get(task.id, ()))
+        self._link(task)
+
+    def remove(self, task):
+        """Unlink a task that was just taken out of the index"""
+        self.root_count += len(self.children.get(task.id, ())) - (1 if self.is_root(task) else 0)
+        self._unlink(task)
+
+    def _link(self, task):
+        """Add a task to its parent's children and its subtree to the rollups"""
+        if task.parent is not None:
+            self.children.setdefault(task.parent, set()).add(task.id)
+            done, total = self.rollup(task.id)
+            self._propagate(task.parent, done + (1 if task.completed else 0), total + 1)
+
+    def _unlink(self, task):
+        """Undo _link"""
+        if task.parent is not None:
+            siblings = self.children.get(task.parent)
+            if siblings is not None:
+                siblings.discard(task.id)
+                if not siblings:
+                    del self.children[task.parent]
+            done, total = self.rollup(task.id)
+            self._propagate(task.parent, -done - (1 if task.completed else 0), -total - 1)
+
+    def _propagate(self, parent_id, done, total):
+        """Add to the rollups of parent_id and its loaded ancestors"""
+        seen = set()
+        while parent_id is not None and parent_id not in seen:
+            seen.add(parent_id)
+            counts = self.rollups.setdefault(parent_id, [0, 0])
+            counts[0] += done
+            counts[1] += total
+            if counts == [0, 0]:
+                del self.rollups[parent_id]
+
+            # A missing ancestor's own parent is unknown; stop there
+            parent = self.lookup(parent_id)
+            if parent is None:
+                break
+            parent_id = parent.parent
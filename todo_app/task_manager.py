@@ -1,127 +1,1065 @@
 # task_manager.py - Manages task data and persistence
 
-import json
-import os
-import random
-from datetime import datetime
-from tkinter import messagebox
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from metrics import metrics
+from save_scheduler import SaveScheduler
+from search_index import SearchIndex
+from storage import PRIORITY_RANK, create_storage
+from task import DATE_FORMAT, Task, parse_timestamp
+from task_analytics import DailyAggregates, DailyHistory, combine_days
+from task_archive import TaskArchive
+from task_hierarchy import TaskHierarchy
+from task_order import TaskOrder
+from undo_history import Change, UndoHistory
+
+# Task IDs reserved from the shared store at a time
+ID_BLOCK_SIZE = 100
+
+class TaskValidationError(ValueError):
+    """Raised when a task is given invalid data, e.g. an empty description"""
+
+
+def is_valid_date(text):
+    """Check that text is a date in the task file format"""
+    try:
+        parse_timestamp(text)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_due(text):
+    """Convert due date text into a timestamp; empty text means no due date
+    
+    Raises TaskValidationError if the text is not in the task file format.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        return parse_timestamp(text)
+    except ValueError:
+        raise TaskValidationError("Due date must be in the format YYYY-MM-DD HH:MM!")
+
+
+def fill_task_defaults(task):
+    """Fill in fields missing from a task dict; return True if any were
+    
+    IDs are left alone; TaskManager.upgrade_task assigns those.
+    """
+    upgraded = False
+    
+    # Add default priority, description, and date_created to old tasks if they don't have them
+    if "priority" not in task:
+        task["priority"] = "medium"
+        upgraded = True
+    if "description" not in task:
+        task["description"] = "No description"
+        upgraded = True
+    if "date_created" not in task or not is_valid_date(task["date_created"]):
+        task["date_created"] = datetime.now().strftime(DATE_FORMAT)
+        upgraded = True
+    if "completed" not in task:
+        task["completed"] = False
+        upgraded = True
+    if task.get("due") is not None and not is_valid_date(task["due"]):
+        del task["due"]
+        upgraded = True
+    if task.get("completed_at") is not None and not is_valid_date(task["completed_at"]):
+        del task["completed_at"]
+        upgraded = True
+    if "parent" in task and (not isinstance(task["parent"], str) or not task["parent"] or task["parent"] == task.get("id")):
+        del task["parent"]
+        upgraded = True
+    return upgraded
+
+
+class TaskChangeEvent:
+    def __init__(self, added=(), updated=(), removed=(), reset=False):
+        """Describe which task IDs a mutation added, updated or removed
+        
+        reset means the whole task list was replaced (e.g. after loading).
+        old_parents is filled in by TaskManager.notify: the parent ID each
+        removed task, and each task moved to another parent, had before.
+        """
+        self.added = list(added)
+        self.updated = list(updated)
+        self.removed = list(removed)
+        self.reset = reset
+        self.old_parents = {}
+    
+    def merge(self, other):
+        """Fold a later event into this one so both can be sent as one"""
+        added = dict.fromkeys(self.added)
+        updated = dict.fromkeys(self.updated)
+        removed = dict.fromkeys(self.removed)
+        
+        for task_id in other.added:
+            removed.pop(task_id, None)
+            added[task_id] = None
+        for task_id in other.updated:
+            if task_id not in added:
+                updated[task_id] = None
+        for task_id in other.removed:
+            updated.pop(task_id, None)
+            # A task added and removed inside the batch was never shown
+            if added.pop(task_id, 1) is not None:
+                removed[task_id] = None
+        
+        self.added = list(added)
+        self.updated = list(updated)
+        self.removed = list(removed)
+        self.reset = self.reset or other.reset
+
 
 class TaskManager:
-    def __init__(self, tasks_file):
-        """Initialize the task manager with a file for persistence"""
+    def __init__(self, tasks_file, engine="journal", storage=None, save_delay=0.5):
+        """Initialize the task manager with a file for persistence
+        
+        engine selects the storage backend ("json", "journal" or "sqlite")
+        unless a ready-made storage object is passed in. Changes are saved
+        on a worker thread once no new change arrived for save_delay
+        seconds; None saves synchronously instead.
+        """
         self.tasks_file = tasks_file
-        self.tasks = []
         
-        # Create the task data file if it doesn't exist
-        if not os.path.exists(self.tasks_file):
-            with open(self.tasks_file, "w") as f:
-                json.dump([], f)
+        # Tasks keyed by ID; dict order is the order tasks were added
+        self._index = {}
+        
+        # Next task ID and the end of the ID block reserved from storage
+        self._next_id = 1
+        self._reserved_until = 1
+        
+        # Running counters behind get_statistics and get_analytics
+        self.rebuild_statistics()
+        
+        # Display order maintained across mutations
+        self._order = TaskOrder()
+        
+        # Description tokens for search, maintained across mutations
+        self._search_index = SearchIndex()
+        
+        # Subtask links and per-task done/total rollups
+        self._hierarchy = TaskHierarchy(self.get_task)
+        
+        # Callbacks notified with a TaskChangeEvent after every mutation
+        self._listeners = []
+        
+        # Parents that removed and moved tasks had, for the next event
+        self._old_parents = {}
+        
+        # Whether iter_load_tasks read every stored task; until then (and
+        # after a load stopped early or failed) the index holds only part
+        self._loaded = False
+        
+        # Open transaction() blocks and the event and save they hold back
+        self._transaction_depth = 0
+        self._transaction_event = None
+        self._transaction_save = False
+        self._transaction_change = None
+        
+        # Reversible deltas of the mutations, for undo() and redo()
+        self.history = UndoHistory()
+        
+        self.storage = storage if storage is not None else create_storage(tasks_file, engine)
+        
+        # Old completed tasks, moved out of the working set by archive_completed
+        self.archive = TaskArchive(tasks_file)
+        
+        # Daily counts of deleted tasks, which stay in the analytics
+        self.daily_history = DailyHistory(tasks_file)
+        
+        # Changes waiting for the save worker; the lock guards them and the
+        # task dicts while the worker takes its copy
+        self._lock = threading.RLock()
+        self._pending_records = []
+        self._full_save_pending = False
+        self._pending_deleted = DailyAggregates()
+        self._deleted_in_flight = DailyAggregates()
+        self.save_errors = queue.Queue()
+        if save_delay is None:
+            self._scheduler = None
+        else:
+            self._scheduler = SaveScheduler(
+                self.write_pending, self.save_errors.put, save_delay, sync_callback=self.sync_storage
+            )
+    
+    @property
+    def tasks(self):
+        """List of all tasks in the order they were added"""
+        return list(self._index.values())
+    
+    def get_task(self, task_id):
+        """Return the task with the given ID, or None"""
+        return self._index.get(task_id)
+    
+    def add_listener(self, callback):
+        """Register a callback to receive a TaskChangeEvent after each change"""
+        self._listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        """Unregister a change callback"""
+        self._listeners.remove(callback)
     
+    def notify(self, event):
+        """Send a change event to all listeners"""
+        if self._transaction_depth:
+            if self._transaction_event is None:
+                self._transaction_event = event
+            else:
+                self._transaction_event.merge(event)
+            return
+        
+        # Every mutation since the last event is part of this one
+        event.old_parents, self._old_parents = self._old_parents, {}
+        for callback in list(self._listeners):
+            callback(event)
+    
+    @contextmanager
+    def transaction(self):
+        """Group mutations so they cost one save, one change event and one undo step
+        
+        Saving and change notifications are held back until the outermost
+        block exits. Changes are applied immediately, so an exception inside
+        the block still commits what was done before it.
+        """
+        self._transaction_depth += 1
+        try:
+            yield self
+        finally:
+            self._transaction_depth -= 1
+            if not self._transaction_depth:
+                event, self._transaction_event = self._transaction_event, None
+                save, self._transaction_save = self._transaction_save, False
+                change, self._transaction_change = self._transaction_change, None
+                if change is not None:
+                    self.history.push(change)
+                if save:
+                    self.schedule_save()
+                if event is not None:
+                    self.notify(event)
+    
+    def generate_id(self):
+        """Return a new task ID that is not used by any task
+        
+        IDs come from blocks reserved in the shared store, so instances
+        running side by side never create tasks with the same ID.
+        """
+        while True:
+            if self._next_id >= self._reserved_until:
+                self._next_id = self.storage.reserve_ids(ID_BLOCK_SIZE, self._next_id)
+                self._reserved_until = self._next_id + ID_BLOCK_SIZE
+            task_id = str(self._next_id)
+            self._next_id += 1
+            if task_id not in self._index:
+                return task_id
+    
+    @metrics.timed("load_tasks")
     def load_tasks(self):
-        """Load tasks from the JSON file"""
+        """Load tasks from the storage backend
+        
+        If loading fails the task list is left empty and the error is raised.
+        """
         try:
-            with open(self.tasks_file, "r") as f:
-                self.tasks = json.load(f)
-                
-                # Add IDs, default priority, description, and date_created to old tasks if they don't have them
-                for task in self.tasks:
-                    if "id" not in task:
-                        task["id"] = str(random.randint(10000, 99999))
-                    if "priority" not in task:
-                        task["priority"] = "medium"
-                    if "description" not in task:
-                        task["description"] = "No description"
-                    if "date_created" not in task:
-                        task["date_created"] = datetime.now().strftime("%Y-%m-%d %H:%M")
-            return True
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load tasks: {str(e)}")
-            self.tasks = []
-            return False
+            for _ in self.iter_load_tasks():
+                pass
+        except Exception:
+            self.reset_tasks()
+            raise
+    
+    def iter_load_tasks(self, batch_size=5000):
+        """Load tasks from storage in batches, yielding the size of each
+        
+        Every batch is announced with one change event, so the UI can show
+        the first tasks while the rest are still being read. Old tasks are
+        upgraded as they stream past, and if any needed it the upgraded list
+        is saved once at the end, so later loads have nothing to migrate.
+        """
+        # Let the save worker finish before reading the files it writes
+        self.flush()
+        self.reset_tasks()
+        
+        upgraded = False
+        for batch in self.storage.iter_load(batch_size):
+            tasks = []
+            for data in batch:
+                if self.upgrade_task(data):
+                    upgraded = True
+                task = Task.from_dict(data)
+                self._insert_task(task)
+                tasks.append(task)
+            self.notify(TaskChangeEvent(added=[task.id for task in tasks]))
+            yield len(batch)
+        
+        with self._lock:
+            self._loaded = True
+        
+        # Persist generated IDs and defaults so journal records can refer to them
+        if upgraded:
+            self.save_tasks()
+    
+    def upgrade_task(self, task):
+        """Fill in fields missing from an old task dict; return True if any were"""
+        upgraded = False
+        
+        # Missing and duplicate IDs (from the old random generator) get a fresh ID
+        task_id = str(task.get("id", ""))
+        if task_id.isdigit():
+            self._next_id = max(self._next_id, int(task_id) + 1)
+        if "id" not in task or task["id"] in self._index:
+            task["id"] = self.generate_id()
+            upgraded = True
+        
+        return fill_task_defaults(task) or upgraded
+    
+    def reset_tasks(self):
+        """Drop all tasks from memory and tell listeners to rebuild"""
+        with self._lock:
+            self._index = {}
+            self._loaded = False
+        self._next_id = 1
+        self._reserved_until = 1
+        self.rebuild_statistics()
+        self.rebuild_order()
+        self.rebuild_search_index()
+        self._hierarchy.clear()
+        self._old_parents = {}
+        self.history.clear()
+        self.notify(TaskChangeEvent(reset=True))
     
     def save_tasks(self):
-        """Save tasks to the JSON file"""
+        """Schedule a save of the complete task list"""
+        with self._lock:
+            self._full_save_pending = True
+        self.schedule_save()
+        return True
+    
+    def record_changes(self, records):
+        """Queue a batch of change records for the storage backend"""
+        with self._lock:
+            self._pending_records.extend(records)
+        self.schedule_save()
+        return True
+    
+    def schedule_save(self):
+        """Hand the pending changes to the save worker, or write them now"""
+        if self._transaction_depth:
+            self._transaction_save = True
+            return
+        
+        if self._scheduler is not None:
+            self._scheduler.mark_dirty()
+            return
+        
         try:
-            with open(self.tasks_file, "w") as f:
-                json.dump(self.tasks, f, indent=2)
-            return True
+            self.write_pending()
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save tasks: {str(e)}")
+            self.save_errors.put(e)
+    
+    @metrics.timed("save")
+    def write_pending(self):
+        """Write the queued changes to storage (runs on the save worker)
+        
+        The storage lock is held throughout, so apply_external_state never
+        sees changes that were taken from the queue but not yet written.
+        """
+        with self.storage.lock:
+            with self._lock:
+                # A partly loaded list must never replace the stored tasks, so
+                # until loading finishes the records are merged into them
+                # (see JsonStorage.append) and full saves wait
+                records = self._pending_records
+                full_save = self._full_save_pending and self._loaded
+                deleted = self._deleted_in_flight = self._pending_deleted
+                self._pending_records = []
+                self._full_save_pending = self._full_save_pending and not self._loaded
+                self._pending_deleted = DailyAggregates()
+                
+                # Copy the tasks only when the backend rewrites the whole file
+                tasks = None
+                if self._loaded and (full_save or self.storage.rewrites_on_change):
+                    tasks = [task.to_dict() for task in self._index.values()]
+            
+            try:
+                # A full save is refused once another instance wrote; the
+                # watcher brings its tasks in, and only the records are kept
+                saved = full_save and self.storage.save(tasks)
+                if not saved and records:
+                    self.storage.append(records, tasks)
+            except Exception:
+                # Keep the changes so the next save retries them
+                with self._lock:
+                    self._pending_records[:0] = records
+                    self._full_save_pending = self._full_save_pending or full_save
+                    self._pending_deleted.add_days(deleted.days)
+                    self._deleted_in_flight = DailyAggregates()
+                raise
+            
+            try:
+                self.daily_history.add(deleted)
+            except Exception:
+                with self._lock:
+                    self._pending_deleted.add_days(deleted.days)
+                raise
+            finally:
+                with self._lock:
+                    self._deleted_in_flight = DailyAggregates()
+    
+    def sync_storage(self):
+        """Make sure saved changes have reached the disk (runs on the save worker)
+        
+        Backends may leave the last writes of a burst unsynced; this bounds
+        how long they stay that way when no further change arrives.
+        """
+        with self.storage.lock:
+            self.storage.flush()
+    
+    def get_save_errors(self):
+        """Return the save errors raised since the last call"""
+        errors = []
+        while not self.save_errors.empty():
+            errors.append(self.save_errors.get())
+        return errors
+    
+    def flush(self):
+        """Write all pending changes and wait until they are saved"""
+        if self._scheduler is not None:
+            self._scheduler.flush()
+    
+    def close(self):
+        """Flush pending writes and close the storage backend"""
+        if self._scheduler is not None:
+            self._scheduler.close()
+        try:
+            self.storage.close()
+        except Exception as e:
+            self.save_errors.put(e)
+        self.archive.close()
+        self.daily_history.close()
+    
+    def has_external_changes(self):
+        """Check whether another process changed the stored tasks"""
+        return self.storage.read_version() != self.storage.version
+    
+    def diff_external_state(self, version, stored_tasks):
+        """Compare tasks read from storage with memory (runs on the watcher thread)
+        
+        version and stored_tasks come from storage.read_state(). Parsing
+        and comparing every task happens here, off the UI thread; the
+        result only lists the tasks that differ, for apply_external_state.
+        The tasks in memory may change meanwhile, so apply_external_state
+        checks each listed task again.
+        """
+        changed, seen = [], set()
+        for data in stored_tasks:
+            task_id = data.get("id")
+            if task_id is None or task_id in seen:
+                continue
+            seen.add(task_id)
+            try:
+                task = Task.from_dict(data)
+            except (KeyError, TypeError, ValueError):
+                # Not written by this application; leave it alone
+                continue
+            if self._index.get(task_id) != task:
+                changed.append(task)
+        
+        with self._lock:
+            removed = [task_id for task_id in self._index if task_id not in seen]
+        return version, changed, removed
+    
+    def apply_external_state(self, state):
+        """Bring tasks written by another process into memory
+        
+        state comes from diff_external_state. Only the tasks it lists are
+        added, updated or removed, and listeners get a single change event.
+        Tasks with changes still waiting to be saved keep the local version;
+        saving merges those changes into the store field by field.
+        
+        Returns False without changing anything if the storage is busy or
+        was written again since the state was read; diff a fresh read then.
+        """
+        version, changed, removed_ids = state
+        if not self.storage.lock.acquire(blocking=False):
             return False
+        try:
+            if self._full_save_pending or self.storage.read_version() != version:
+                return False
+            
+            with self._lock:
+                local_ids = set()
+                for record in self._pending_records:
+                    if record["op"] == "put":
+                        local_ids.add(record["task"]["id"])
+                    elif record["op"] == "set":
+                        local_ids.add(record["id"])
+                    else:
+                        local_ids.update(record["ids"])
+            
+            added, updated = [], []
+            for task in changed:
+                if task.id in local_ids:
+                    continue
+                current = self._index.get(task.id)
+                if current is None:
+                    self._insert_task(task)
+                    added.append(task.id)
+                elif current != task:
+                    self._modify_task(current, {name: getattr(task, name) for name in Task.__slots__})
+                    updated.append(task.id)
+            
+            removed = [
+                task_id for task_id in removed_ids
+                if task_id in self._index and task_id not in local_ids
+            ]
+            for task_id in removed:
+                self._remove_task(task_id)
+            
+            self.storage.version = version
+        finally:
+            self.storage.lock.release()
+        
+        if added or updated or removed:
+            self.notify(TaskChangeEvent(added=added, updated=updated, removed=removed))
+        return True
     
-    def add_task(self, description, priority):
-        """Add a new task to the task list"""
+    def add_task(self, description, priority, due="", parent=None):
+        """Add a new task to the task list and return its ID
+        
+        due is a "YYYY-MM-DD HH:MM" date or empty for none; parent is the ID
+        of the task this one becomes a subtask of. Raises TaskValidationError
+        if the description is empty, due is invalid or parent is unknown.
+        """
         if not description.strip():
-            messagebox.showwarning("Warning", "Task description cannot be empty!")
-            return False
+            raise TaskValidationError("Task description cannot be empty!")
         
-        # Create new task
-        new_task = {
-            "description": description.strip(),
-            "priority": priority,
-            "date_created": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "completed": False,
-            "id": str(random.randint(10000, 99999))
-        }
+        return self.add_tasks([(description, priority, due, parent)])[0]
+    
+    def add_tasks(self, items):
+        """Add several (description, priority[, due[, parent]]) tasks; return their IDs
         
-        # Add to task list
-        self.tasks.append(new_task)
-        self.save_tasks()
-        return True
+        Items with an empty description are skipped. Due dates and parents
+        are checked before any task is added, so an invalid one adds nothing.
+        """
+        parsed = []
+        for description, priority, *optional in items:
+            due = optional[0] if optional else ""
+            parent = optional[1] if len(optional) > 1 else None
+            if parent is not None and parent not in self._index:
+                raise TaskValidationError("The parent task does not exist!")
+            if description.strip():
+                parsed.append((description.strip(), priority, parse_due(due), parent))
+        
+        new_tasks = []
+        for description, priority, due, parent in parsed:
+            # Create new task
+            new_task = Task(self.generate_id(), description, priority, due=due, parent=parent)
+            self._insert_task(new_task)
+            new_tasks.append(new_task)
+        
+        if new_tasks:
+            self.record_history("add", new_tasks)
+            self.record_changes([{"op": "put", "task": task.to_dict()} for task in new_tasks])
+            self.notify(TaskChangeEvent(added=[task.id for task in new_tasks]))
+        return [task.id for task in new_tasks]
     
     def delete_task(self, task_id):
         """Delete a task by its ID"""
-        self.tasks = [task for task in self.tasks if task["id"] != task_id]
-        self.save_tasks()
+        return bool(self.delete_tasks([task_id]))
+    
+    def delete_tasks(self, task_ids):
+        """Delete several tasks by ID; return the IDs that were deleted"""
+        entries = self._remove_tasks(task_ids)
+        removed = [task.id for _, task in entries]
+        
+        if removed:
+            self.count_deleted([task for _, task in entries], 1)
+            self.record_history("remove", entries)
+            self.record_changes([{"op": "del", "ids": removed}])
+            self.notify(TaskChangeEvent(removed=removed))
+        return removed
     
-    def update_task(self, task_id, description=None, priority=None, completed=None):
+    def update_task(self, task_id, description=None, priority=None, completed=None, due=None, parent=None):
         """Update a task's properties"""
-        for task in self.tasks:
-            if task["id"] == task_id:
-                if description is not None:
-                    task["description"] = description.strip()
-                if priority is not None:
-                    task["priority"] = priority
-                if completed is not None:
-                    task["completed"] = completed
-                self.save_tasks()
-                return True
-        return False
+        return bool(self.update_tasks([task_id], description, priority, completed, due, parent))
+    
+    def update_tasks(self, task_ids, description=None, priority=None, completed=None, due=None, parent=None):
+        """Update the same properties on several tasks; return the updated IDs
+        
+        None leaves a property unchanged; an empty due removes the due date
+        and an empty parent moves the tasks to the top level. Raises
+        TaskValidationError if the new description is empty, the due date
+        is invalid, or the parent is unknown or one of the tasks' subtasks.
+        """
+        fields = {}
+        if description is not None:
+            if not description.strip():
+                raise TaskValidationError("Task description cannot be empty!")
+            fields["description"] = description.strip()
+        if priority is not None:
+            fields["priority"] = priority
+        if completed is not None:
+            fields["completed"] = completed
+        if due is not None:
+            fields["due"] = parse_due(due)
+        if parent is not None:
+            if parent and parent not in self._index:
+                raise TaskValidationError("The parent task does not exist!")
+            if any(self._hierarchy.would_cycle(task_id, parent) for task_id in task_ids):
+                raise TaskValidationError("A task cannot become a subtask of itself or its subtasks!")
+            fields["parent"] = parent or None
+        
+        updated = []
+        for task_id in task_ids:
+            task = self._index.get(task_id)
+            if task is None:
+                continue
+            updated.append((task, self._modify_task(task, fields), fields))
+        
+        return self._record_updates(updated)
     
     def toggle_task_status(self, task_id):
         """Toggle a task's completion status"""
-        for task in self.tasks:
-            if task["id"] == task_id:
-                task["completed"] = not task["completed"]
-                self.save_tasks()
-                return True
-        return False
+        return bool(self.toggle_tasks([task_id]))
+    
+    def toggle_tasks(self, task_ids):
+        """Toggle the completion status of several tasks; return their IDs"""
+        updated = []
+        for task_id in task_ids:
+            task = self._index.get(task_id)
+            if task is None:
+                continue
+            fields = {"completed": not task.completed}
+            updated.append((task, self._modify_task(task, fields), fields))
+        
+        return self._record_updates(updated)
     
     def clear_completed_tasks(self):
-        """Remove all completed tasks"""
-        if not any(task["completed"] for task in self.tasks):
-            messagebox.showinfo("Info", "No completed tasks to clear.")
+        """Remove all completed tasks; return False if there were none"""
+        completed_ids = [task.id for task in self._index.values() if task.completed]
+        if not completed_ids:
             return False
         
-        self.tasks = [task for task in self.tasks if not task["completed"]]
-        self.save_tasks()
+        self.delete_tasks(completed_ids)
+        return True
+    
+    @metrics.timed("archive")
+    def archive_completed(self, max_age_days):
+        """Move tasks completed more than max_age_days ago to the archive
+        
+        Tasks from before completion times were recorded count from their
+        creation. The tasks are written to the archive first and then
+        deleted from storage while the storage lock is still held, so two
+        instances never archive the same task. Archiving is not an undo
+        step. Returns the number of tasks archived; nothing is done while
+        changes from another instance are still to be picked up.
+        """
+        cutoff = time.time() - max_age_days * 86400
+        with self.storage.lock:
+            if self.has_external_changes():
+                return 0
+            
+            # Tasks the last run archived but crashed before deleting
+            recent_ids = self.archive.recent_ids()
+            old_tasks = []
+            leftover_ids = []
+            for task in self._index.values():
+                if not task.completed:
+                    continue
+                if task.id in recent_ids:
+                    leftover_ids.append(task.id)
+                elif (task.completed_at or task.created) < cutoff:
+                    old_tasks.append(task)
+            if not old_tasks and not leftover_ids:
+                return 0
+            
+            self.archive.append(old_tasks)
+            
+            entries = self._remove_tasks([task.id for task in old_tasks] + leftover_ids)
+            removed = [task.id for _, task in entries]
+            self.record_changes([{"op": "del", "ids": removed}])
+            
+            # Write the deletion before other instances can take the lock
+            try:
+                self.write_pending()
+            except Exception as e:
+                # The queued records are retried by the next save
+                self.save_errors.put(e)
+        
+        self.notify(TaskChangeEvent(removed=removed))
+        return len(old_tasks)
+    
+    @metrics.timed("import_batch")
+    def import_tasks(self, records):
+        """Add a batch of imported task dicts; return (imported, skipped)
+        
+        Records should be normalized by task_transfer first. Records whose
+        ID already belongs to a task are skipped as duplicates, and records
+        without an ID get a new one, so ImportJob hands them over after every
+        record that brings its own ID. Imports are not undo steps.
+        """
+        new_tasks = []
+        skipped = 0
+        for data in records:
+            if data.get("id") in self._index:
+                skipped += 1
+                continue
+            self.upgrade_task(data)
+            task = Task.from_dict(data)
+            self._insert_task(task)
+            new_tasks.append(task)
+        
+        if new_tasks:
+            self.record_changes([{"op": "put", "task": task.to_dict()} for task in new_tasks])
+            self.notify(TaskChangeEvent(added=[task.id for task in new_tasks]))
+        return len(new_tasks), skipped
+    
+    def _record_updates(self, updates):
+        """Save and announce (task, old fields, new fields) updates; return the IDs"""
+        tasks = [task for task, _, _ in updates]
+        if tasks:
+            self.record_history("update", [(task.id, old, new) for task, old, new in updates])
+            self.record_changes([
+                {"op": "set", "id": task.id, "fields": task.file_fields(old)} for task, old, _ in updates
+            ])
+            self.notify(TaskChangeEvent(updated=[task.id for task in tasks]))
+        return [task.id for task in tasks]
+    
+    def record_history(self, kind, items):
+        """Add a step to the undo history (see undo_history.Change)"""
+        change = Change()
+        change.add_step(kind, items)
+        if self._transaction_depth:
+            if self._transaction_change is None:
+                self._transaction_change = change
+            else:
+                self._transaction_change.merge(change)
+        else:
+            self.history.push(change)
+    
+    def can_undo(self):
+        return self.history.can_undo()
+    
+    def can_redo(self):
+        return self.history.can_redo()
+    
+    @metrics.timed("undo")
+    def undo(self):
+        """Revert the last change; return False if there is nothing to undo"""
+        change = self.history.pop_undo()
+        if change is None:
+            return False
+        self.history.push_redo(self._revert(change))
+        return True
+    
+    @metrics.timed("redo")
+    def redo(self):
+        """Apply the last undone change again; return False if there is none"""
+        change = self.history.pop_redo()
+        if change is None:
+            return False
+        self.history.push_undo(self._revert(change))
         return True
     
+    def _revert(self, change):
+        """Apply the inverse of a change and return the change that reverts it
+        
+        Steps are undone newest first. Tasks that another instance has
+        removed or re-created in the meantime are skipped.
+        """
+        inverse = Change()
+        records = []
+        event = TaskChangeEvent()
+        
+        for kind, items in reversed(change.steps):
+            if kind == "add":
+                entries = self._remove_tasks([task.id for task in items])
+                removed = [task.id for _, task in entries]
+                self.count_deleted([task for _, task in entries], 1)
+                inverse.add_step("remove", entries)
+                if removed:
+                    records.append({"op": "del", "ids": removed})
+                event.merge(TaskChangeEvent(removed=removed))
+            elif kind == "remove":
+                entries = [(sequence, task) for sequence, task in items if task.id not in self._index]
+                self._insert_tasks(entries)
+                tasks = [task for _, task in entries]
+                self.count_deleted(tasks, -1)
+                inverse.add_step("add", tasks)
+                records.extend({"op": "put", "task": task.to_dict()} for task in tasks)
+                event.merge(TaskChangeEvent(added=[task.id for task in tasks]))
+            elif kind == "update":
+                reverted = []
+                for task_id, old, new in reversed(items):
+                    task = self._index.get(task_id)
+                    if task is None:
+                        continue
+                    changed = self._modify_task(task, old)
+                    reverted.append((task_id, new, old))
+                    records.append({"op": "set", "id": task_id, "fields": task.file_fields(changed)})
+                inverse.add_step("update", reverted)
+                event.merge(TaskChangeEvent(updated=[task_id for task_id, _, _ in reverted]))
+        
+        if records:
+            self.record_changes(records)
+            self.notify(event)
+        return inverse
+    
+    def _insert_task(self, task):
+        """Add a task to the index, counters, display order and search index"""
+        with self._lock:
+            self._index[task.id] = task
+        self._hierarchy.add(task)
+        self.count_task(task, 1)
+        self._order.add(task)
+        self._search_index.add(task)
+    
+    def _remove_task(self, task_id):
+        """Remove a task from all indexes; return it, or None if unknown"""
+        with self._lock:
+            task = self._index.pop(task_id, None)
+        if task is not None:
+            self._hierarchy.remove(task)
+            self._remember_parent(task, task.parent)
+            self.count_task(task, -1)
+            self._order.remove(task_id)
+            self._search_index.remove(task_id)
+        return task
+    
+    def _insert_tasks(self, entries):
+        """Put removed (sequence, task) pairs back at their display positions"""
+        with self._lock:
+            for _, task in entries:
+                self._index[task.id] = task
+                self._hierarchy.add(task)
+        for _, task in entries:
+            self.count_task(task, 1)
+        self._search_index.add_many(task for _, task in entries)
+        self._order.add_many((task, sequence) for sequence, task in entries)
+    
+    def _remove_tasks(self, task_ids):
+        """Remove several tasks from all indexes; return (sequence, task) pairs"""
+        tasks = []
+        with self._lock:
+            for task_id in task_ids:
+                task = self._index.pop(task_id, None)
+                if task is not None:
+                    self._hierarchy.remove(task)
+                    self._remember_parent(task, task.parent)
+                    tasks.append(task)
+        for task in tasks:
+            self.count_task(task, -1)
+            self._search_index.remove(task.id)
+        sequences = self._order.remove_many([task.id for task in tasks])
+        return list(zip(sequences, tasks))
+    
+    def _remember_parent(self, task, parent_id):
+        """Note the parent a task had before the pending change event"""
+        if parent_id is not None:
+            self._old_parents.setdefault(task.id, parent_id)
+    
+    def _modify_task(self, task, fields):
+        """Change fields of a task and keep all indexes in step
+        
+        Returns the previous values of the changed fields.
+        """
+        # Completing a task stamps the time, so archiving can tell its age
+        if "completed" in fields and "completed_at" not in fields and fields["completed"] != task.completed:
+            fields = dict(fields, completed_at=int(time.time()) if fields["completed"] else None)
+        
+        old = {name: getattr(task, name) for name in fields}
+        
+        # Rollups depend on the parent and the completion status
+        relink = any(name in fields and fields[name] != old[name] for name in ("parent", "completed"))
+        if relink:
+            self._hierarchy.remove(task)
+            if "parent" in fields:
+                self._remember_parent(task, old["parent"])
+        self.count_task(task, -1)
+        with self._lock:
+            task.set_fields(fields)
+        self.count_task(task, 1)
+        if relink:
+            self._hierarchy.add(task)
+        self._order.update(task)
+        if "description" in fields:
+            self._search_index.update(task)
+        return old
+    
+    @metrics.timed("get_sorted_tasks")
     def get_sorted_tasks(self):
         """Get tasks sorted by completion status and priority"""
-        return sorted(self.tasks, 
-                      key=lambda x: (x["completed"], {"high": 0, "medium": 1, "low": 2}.get(x.get("priority", "medium"), 1)))
+        return [self._index[task_id] for task_id in self._order]
+    
+    def get_children(self, task_id):
+        """Get the subtasks of a task in display order"""
+        child_ids = self._hierarchy.children.get(task_id, ())
+        return [self._index[child_id] for child_id in sorted(child_ids, key=self._order.sort_key)]
+    
+    def has_children(self, task_id):
+        """Check whether a task has subtasks"""
+        return self._hierarchy.has_children(task_id)
+    
+    def get_rollup(self, task_id):
+        """Get (done, total) over all subtasks of a task, nested ones included"""
+        return self._hierarchy.rollup(task_id)
+    
+    def is_top_level(self, task):
+        """Check whether a task is shown at the top level (no loaded parent)"""
+        return self._hierarchy.is_root(task)
+    
+    def iter_top_level_tasks(self):
+        """Iterate over the top-level tasks in display order"""
+        is_root = self._hierarchy.is_root
+        for task_id in self._order:
+            task = self._index[task_id]
+            if is_root(task):
+                yield task
+    
+    def count_top_level_tasks(self):
+        """Get the number of top-level tasks from the running counter"""
+        return self._hierarchy.root_count
+    
+    def get_tasks_slice(self, start, stop):
+        """Get the tasks at display positions start to stop"""
+        return [self._index[task_id] for task_id in self._order.slice(start, stop)]
+    
+    def get_display_index(self, task_id):
+        """Get the display position of a task"""
+        return self._order.index_of(task_id)
+    
+    @metrics.timed("search_tasks")
+    def search_tasks(self, text="", priority=None, status=None, created_since=None):
+        """Get the tasks matching a search, in display order
+        
+        text matches tasks whose description has a word starting with each
+        query word. priority ("high", "medium", "low"), status ("pending",
+        "completed") and created_since ("YYYY-MM-DD") narrow the result;
+        None means any.
+        """
+        if created_since is not None:
+            created_since = parse_timestamp(created_since + " 00:00")
+        
+        # Status and priority select whole buckets of the display order
+        buckets = [
+            bucket for bucket in range(6)
+            if (status is None or (bucket >= 3) == (status == "completed"))
+            and (priority is None or bucket % 3 == PRIORITY_RANK.get(priority, 1))
+        ]
+        
+        matches = self._search_index.search(text)
+        if matches is None:
+            ids = (task_id for bucket in buckets for task_id in self._order.bucket_ids(bucket))
+        else:
+            ids = sorted(
+                (task_id for task_id in matches if self._order.sort_key(task_id)[0] in buckets),
+                key=self._order.sort_key
+            )
+        
+        results = []
+        for task_id in ids:
+            task = self._index[task_id]
+            if priority is not None and task.priority != priority:
+                continue
+            if created_since is not None and task.created < created_since:
+                continue
+            results.append(task)
+        return results
+    
+    def rebuild_search_index(self):
+        """Rebuild the search index from the task index"""
+        self._search_index.clear()
+        for task in self._index.values():
+            self._search_index.add(task)
+    
+    def rebuild_order(self):
+        """Rebuild the display order from the task index"""
+        self._order.clear()
+        for task in self._index.values():
+            self._order.add(task)
     
     def get_statistics(self):
-        """Get statistics about the current tasks"""
-        total = len(self.tasks)
-        completed = sum(1 for task in self.tasks if task["completed"])
-        pending = total - completed
-        high_priority = sum(1 for task in self.tasks if task["priority"] == "high" and not task["completed"])
+        """Get statistics about the current tasks from the running counters"""
+        return {
+            "total": self._total,
+            "completed": self._completed,
+            "pending": self._total - self._completed,
+            "high_priority": self._pending_by_priority.get("high", 0),
+            "by_priority": dict(self._by_priority),
+            "pending_by_priority": dict(self._pending_by_priority)
+        }
+    
+    def get_analytics(self, day_count=30):
+        """Get created/completed counts per day for the last day_count days
         
+        Sums the daily buckets of the loaded tasks, of deleted tasks (see
+        count_deleted) and of those kept in the archive summary, so the
+        cost depends on day_count, not on how many tasks there are. The
+        median time to complete is estimated from the buckets' histograms.
+        """
+        today = date.today()
+        days = [(today - timedelta(days=offset)).isoformat() for offset in range(day_count - 1, -1, -1)]
+        with self._lock:
+            deleted = [self._pending_deleted.days, self._deleted_in_flight.days]
+        day_maps = [self._daily.days, self.daily_history.days(), self.archive.summary()["days"]]
+        window = combine_days(day_maps + deleted, days)
         return {
-            "total": total,
-            "completed": completed,
-            "pending": pending,
-            "high_priority": high_priority
-        }
\ No newline at end of file
+            "days": days,
+            "created": [window.created_on(day) for day in days],
+            "completed": [window.completed_on(day) for day in days],
+            "created_by_priority": window.by_priority("created"),
+            "completed_by_priority": window.by_priority("completed"),
+            "median_completion": window.median_duration()
+        }
+    
+    def count_task(self, task, delta):
+        """Add (delta=1) or remove (delta=-1) a task from the running counters"""
+        priority = task.priority
+        self._total += delta
+        self._by_priority[priority] = self._by_priority.get(priority, 0) + delta
+        if task.completed:
+            self._completed += delta
+        else:
+            self._pending_by_priority[priority] = self._pending_by_priority.get(priority, 0) + delta
+        self._daily.count(task, delta)
+    
+    def count_deleted(self, tasks, delta):
+        """Keep (delta=1) or drop (delta=-1) the daily counts of deleted tasks
+        
+        Deleting a task removes it from the running counters but not from
+        the days it was created and completed on; the save worker adds
+        these counts to daily_history. Undoing the deletion drops them.
+        """
+        with self._lock:
+            for task in tasks:
+                self._pending_deleted.count(task, delta)
+    
+    def rebuild_statistics(self):
+        """Recount the statistics counters from scratch"""
+        self._total = 0
+        self._completed = 0
+        self._by_priority = {}
+        self._pending_by_priority = {}
+        self._daily = DailyAggregates()
+        for task in self._index.values():
+            self.count_task(task, 1)
+    
+    def check_statistics(self):
+        """Verify the running counters against a full recount
+        
+        Returns True if they were consistent; otherwise they are rebuilt.
+        """
+        current = self.get_statistics()
+        self.rebuild_statistics()
+        recounted = self.get_statistics()
+        
+        # Priorities whose count dropped to zero may linger in the counters
+        for key in ("by_priority", "pending_by_priority"):
+            current[key] = {priority: count for priority, count in current[key].items() if count}
+            recounted[key] = {priority: count for priority, count in recounted[key].items() if count}
+        return current == recounted
@@ -0,0 +1,132 @@
+# task_order.py - Keeps tasks in display order without re-sorting
+
+from bisect import bisect_left, insort
+
+from storage import PRIORITY_RANK
+
+class TaskOrder:
+    """Task IDs in display order: pending before completed, then by priority
+
+    Tasks live in six buckets keyed by (completed, priority). Each bucket is
+    a sorted list of (sequence, id) pairs, where the sequence number records
+    when the task was added, so tasks keep a stable order inside a bucket.
+    """
+
+    def __init__(self):
+        self.buckets = [[] for _ in range(6)]
+
+        # Bucket number and sequence number of every task ID
+        self.positions = {}
+        self.next_sequence = 0
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, task_id):
+        return task_id in self.positions
+
+    def __iter__(self):
+        """Iterate over the task IDs in display order"""
+        for bucket in self.buckets:
+            for _, task_id in bucket:
+                yield task_id
+
+    def bucket_ids(self, bucket):
+        """Iterate over the task IDs of one bucket in display order"""
+        for _, task_id in self.buckets[bucket]:
+            yield task_id
+
+    def sort_key(self, task_id):
+        """Return a key that sorts task IDs into display order"""
+        return self.positions[task_id]
+
+    def bucket_of(self, task):
+        """Return the bucket number a task belongs in"""
+        rank = PRIORITY_RANK.get(task.priority, 1)
+        return (3 if task.completed else 0) + rank
+
+    def clear(self):
+        """Remove all tasks"""
+        self.buckets = [[] for _ in range(6)]
+        self.positions = {}
+        self.next_sequence = 0
+
+    def add(self, task, sequence=None):
+        """Insert a task; new tasks go after all tasks added before them"""
+        if sequence is None:
+            sequence = self.next_sequence
+        self.next_sequence = max(self.next_sequence, sequence + 1)
+
+        bucket = self.bucket_of(task)
+        insort(self.buckets[bucket], (sequence, task.id))
+        self.positions[task.id] = (bucket, sequence)
+
+    def add_many(self, entries):
+        """Insert (task, sequence) pairs, merging them into each bucket at once"""
+        added = [[] for _ in range(6)]
+        for task, sequence in entries:
+            bucket = self.bucket_of(task)
+            added[bucket].append((sequence, task.id))
+            self.positions[task.id] = (bucket, sequence)
+            self.next_sequence = max(self.next_sequence, sequence + 1)
+
+        for bucket, new_entries in enumerate(added):
+            if new_entries:
+                self.buckets[bucket] = sorted(self.buckets[bucket] + new_entries)
+
+    def remove(self, task_id):
+        """Remove a task and return its sequence number"""
+        bucket, sequence = self.positions.pop(task_id)
+        entries = self.buckets[bucket]
+        del entries[bisect_left(entries, (sequence, task_id))]
+        return sequence
+
+    def remove_many(self, task_ids):
+        """Remove several tasks and return their sequence numbers
+
+        Large batches filter each bucket once instead of deleting entries
+        one by one.
+        """
+        if len(task_ids) < 64:
+            return [self.remove(task_id) for task_id in task_ids]
+
+        sequences = []
+        doomed = [set() for _ in range(6)]
+        for task_id in task_ids:
+            bucket, sequence = self.positions.pop(task_id)
+            doomed[bucket].add(task_id)
+            sequences.append(sequence)
+
+        for bucket, ids in enumerate(doomed):
+            if ids:
+                self.buckets[bucket] = [entry for entry in self.buckets[bucket] if entry[1] not in ids]
+        return sequences
+
+    def update(self, task):
+        """Move a task to its new bucket after its status or priority changed"""
+        bucket, sequence = self.positions[task.id]
+        if bucket != self.bucket_of(task):
+            self.remove(task.id)
+            self.add(task, sequence)
+
+    def index_of(self, task_id):
+        """Return the display position of a task"""
+        bucket, sequence = self.positions[task_id]
+        offset = sum(len(entries) for entries in self.buckets[:bucket])
+        return offset + bisect_left(self.buckets[bucket], (sequence, task_id))
+
+    def slice(self, start, stop):
+        """Return the task IDs at display positions start to stop"""
+        ids = []
+        for entries in self.buckets:
+            if start >= len(entries):
+                # Skip whole buckets before the requested range
+                start -= len(entries)
+                stop -= len(entries)
+                continue
+            ids.extend(task_id for _, task_id in entries[start:max(start, stop)])
+            stop -= len(entries)
+            start = 0
+            if stop <= 0:
+                break
+        return ids
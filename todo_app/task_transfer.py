@@ -0,0 +1,264 @@
+# task_transfer.py - Streaming import and export of CSV and NDJSON task files
+
+import csv
+import json
+import os
+import queue
+import tempfile
+import threading
+
+from task_manager import fill_task_defaults
+
+# Records handed to the UI thread at a time
+IMPORT_BATCH_SIZE = 1000
+
+# Parsed batches buffered ahead of the UI thread, bounding memory use
+IMPORT_QUEUE_SIZE = 4
+
+# Columns of exported CSV files
+CSV_COLUMNS = ("id", "description", "priority", "date_created", "completed", "due", "completed_at", "parent")
+
+# Spellings of a completed task in the "completed" column of CSV files
+TRUE_TEXT = ("true", "1", "yes", "y", "x", "done", "completed")
+
+
+def format_from_path(path):
+    """Guess the file format from the extension: "csv" or "ndjson" """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".ndjson", ".jsonl"):
+        return "ndjson"
+    raise ValueError(f"Unknown file type: {extension or path} (use .csv, .ndjson or .jsonl)")
+
+
+def normalize_record(data):
+    """Clean up an imported task dict in place and return it
+
+    Values are coerced to the types of the task file, unknown priorities
+    become "medium" and missing fields get the defaults load_tasks fills
+    in. Empty text fields count as missing.
+    """
+    for key in ("id", "due", "completed_at", "parent", "date_created", "description", "priority"):
+        if key in data and (data[key] is None or str(data[key]).strip() == ""):
+            del data[key]
+
+    for key in ("id", "parent"):
+        if key in data:
+            data[key] = str(data[key]).strip()
+    if "description" in data:
+        data["description"] = str(data["description"]).strip()
+    if "priority" in data:
+        priority = str(data["priority"]).strip().lower()
+        data["priority"] = priority if priority in ("high", "medium", "low") else "medium"
+    if isinstance(data.get("completed"), str):
+        data["completed"] = data["completed"].strip().lower() in TRUE_TEXT
+    elif "completed" in data:
+        data["completed"] = bool(data["completed"])
+
+    fill_task_defaults(data)
+    return data
+
+
+class TransferJob:
+    """A file import or export running on a worker thread
+
+    The UI thread starts the job, polls progress() and done(), and may
+    cancel() it at any time. error holds the exception that stopped the
+    worker, if any.
+    """
+
+    def __init__(self):
+        self.error = None
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._guarded_run, daemon=True)
+
+    def start(self):
+        """Start the worker thread"""
+        self._thread.start()
+
+    def cancel(self):
+        """Ask the worker to stop at the next record"""
+        self._cancelled.set()
+
+    def cancelled(self):
+        """Check whether cancel() was called"""
+        return self._cancelled.is_set()
+
+    def done(self):
+        """Check whether the worker has finished"""
+        return not self._thread.is_alive()
+
+    def progress(self):
+        """Return the finished fraction, from 0.0 to 1.0"""
+        raise NotImplementedError
+
+    def _guarded_run(self):
+        """Run the job, keeping the exception that stopped it"""
+        try:
+            self._run()
+        except Exception as e:
+            self.error = e
+
+    def _run(self):
+        """Do the work (runs on the worker thread)"""
+        raise NotImplementedError
+
+
+class ImportJob(TransferJob):
+    """Reads a CSV or NDJSON file into batches of normalized task dicts
+
+    The worker parses the file in a stream and queues batches of up to
+    IMPORT_BATCH_SIZE records; the UI thread takes them with next_batch()
+    and hands them to TaskManager.import_tasks. Only a few batches are
+    parsed ahead, so huge files never sit in memory whole. Repeated IDs
+    within the file are skipped (see duplicates); lines that cannot be
+    parsed are skipped and counted in invalid.
+
+    Records without an ID are held in a temporary file and come last, once
+    every ID the file brings along is in, so the IDs the task manager gives
+    them can never take one that a later record needs.
+    """
+
+    def __init__(self, path, file_format=None, batch_size=IMPORT_BATCH_SIZE):
+        super().__init__()
+        self.path = path
+        self.format = file_format or format_from_path(path)
+        self.batch_size = batch_size
+        self.total_bytes = os.path.getsize(path)
+        self.bytes_read = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self._batches = queue.Queue(IMPORT_QUEUE_SIZE)
+
+    def progress(self):
+        return self.bytes_read / self.total_bytes if self.total_bytes else 1.0
+
+    def next_batch(self):
+        """Return the next parsed batch, or None if none is ready"""
+        try:
+            return self._batches.get_nowait()
+        except queue.Empty:
+            return None
+
+    def _run(self):
+        seen = set()
+        batch = []
+        with open(self.path, "rb") as f, tempfile.TemporaryFile("w+", encoding="utf-8") as without_id:
+            records = self._iter_csv(f) if self.format == "csv" else self._iter_ndjson(f)
+            for data in records:
+                if self.cancelled():
+                    return
+                normalize_record(data)
+                if "id" not in data:
+                    without_id.write(json.dumps(data) + "\n")
+                    continue
+                if data["id"] in seen:
+                    self.duplicates += 1
+                    continue
+                seen.add(data["id"])
+                batch = self._add(batch, data)
+
+            without_id.seek(0)
+            for line in without_id:
+                if self.cancelled():
+                    return
+                batch = self._add(batch, json.loads(line))
+        if batch:
+            self._put(batch)
+
+    def _add(self, batch, data):
+        """Add a record to the batch; queue it when full and return the next one"""
+        batch.append(data)
+        if len(batch) >= self.batch_size:
+            self._put(batch)
+            return []
+        return batch
+
+    def _put(self, batch):
+        """Queue a batch, waiting for room unless the job is cancelled"""
+        while not self.cancelled():
+            try:
+                self._batches.put(batch, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _iter_lines(self, f):
+        """Yield decoded lines of a binary file, counting the bytes read"""
+        for number, line in enumerate(f):
+            self.bytes_read += len(line)
+            text = line.decode("utf-8", errors="replace")
+            yield text.lstrip("\ufeff") if number == 0 else text
+
+    def _iter_ndjson(self, f):
+        for line in self._iter_lines(f):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                self.invalid += 1
+                continue
+            if isinstance(data, dict):
+                yield data
+            else:
+                self.invalid += 1
+
+    def _iter_csv(self, f):
+        for row in csv.DictReader(self._iter_lines(f)):
+            # Cells beyond the header row land under the None key
+            row.pop(None, None)
+            yield {key.strip(): value for key, value in row.items() if key and value}
+
+
+class ExportJob(TransferJob):
+    """Writes tasks to a CSV or NDJSON file
+
+    tasks is a list of Task objects taken on the UI thread. The file is
+    written under a temporary name and renamed when complete, so a
+    cancelled or failed export leaves any existing file untouched.
+    """
+
+    def __init__(self, path, tasks, file_format=None):
+        super().__init__()
+        self.path = path
+        self.format = file_format or format_from_path(path)
+        self.tasks = tasks
+        self.written = 0
+
+    def progress(self):
+        return self.written / len(self.tasks) if self.tasks else 1.0
+
+    def _run(self):
+        temp_file = self.path + ".tmp"
+        try:
+            with open(temp_file, "w", newline="", encoding="utf-8") as f:
+                if self.format == "csv":
+                    self._write_csv(f)
+                else:
+                    self._write_ndjson(f)
+                if self.cancelled():
+                    return
+            os.replace(temp_file, self.path)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+    def _write_ndjson(self, f):
+        for task in self.tasks:
+            if self.cancelled():
+                return
+            f.write(json.dumps(task.to_dict()) + "\n")
+            self.written += 1
+
+    def _write_csv(self, f):
+        writer = csv.DictWriter(f, CSV_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for task in self.tasks:
+            if self.cancelled():
+                return
+            data = task.to_dict()
+            data["completed"] = "true" if data["completed"] else "false"
+            writer.writerow(data)
+            self.written += 1
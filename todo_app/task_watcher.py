@@ -0,0 +1,47 @@
+# task_watcher.py - Picks up tasks saved by other instances of the app
+
+import threading
+
+class TaskWatcher:
+    """Polls the task store for changes made by other processes
+
+    poll() is meant to run every second or so on the UI thread. It only
+    compares version stamps; when another process wrote, the stored tasks
+    are read, parsed and compared with memory on a worker thread, and a
+    later poll applies just the tasks that differ, so the UI thread never
+    waits for the file or walks every task.
+    """
+
+    def __init__(self, task_manager):
+        self.task_manager = task_manager
+        self._thread = None
+        self._result = None
+
+    def poll(self):
+        """Check for external changes; return True if tasks were reloaded"""
+        if self._thread is not None:
+            if self._thread.is_alive():
+                return False
+            self._thread = None
+            result, self._result = self._result, None
+            if result is not None and self.task_manager.apply_external_state(result):
+                return True
+
+        try:
+            changed = self.task_manager.has_external_changes()
+        except Exception:
+            # The store is busy or being replaced; try again next time
+            return False
+
+        if changed:
+            self._thread = threading.Thread(target=self._read, daemon=True)
+            self._thread.start()
+        return False
+
+    def _read(self):
+        """Read the stored tasks and diff them with memory (runs on the worker thread)"""
+        try:
+            self._result = self.task_manager.diff_external_state(*self.task_manager.storage.read_state())
+        except Exception:
+            # A half-written file from another writer; the next poll retries
+            self._result = None
@@ -1,33 +1,181 @@
 # theme_manager.py - Manages application themes and styling
 
+import json
+import os
+
 from tkinter import font, ttk
 
+# Color palettes the user can switch between at runtime
+PALETTES = {
+    "light": {
+        "bg_main": "#f5f5f5",
+        "bg_sidebar": "#3a4750",
+        "accent": "#00adb5",
+        "text_light": "#ffffff",
+        "text_dark": "#303841",
+        "high_priority": "#ff5252",
+        "medium_priority": "#ffb142",
+        "low_priority": "#2ed573"
+    },
+    "dark": {
+        "bg_main": "#222831",
+        "bg_sidebar": "#171a1f",
+        "accent": "#00adb5",
+        "text_light": "#eeeeee",
+        "text_dark": "#e4e6eb",
+        "high_priority": "#ff6b6b",
+        "medium_priority": "#ffc15e",
+        "low_priority": "#4be38a"
+    }
+}
+
+DEFAULT_THEME = "light"
+
+# Named fonts shared by all components
+FONTS = {
+    "title": {"family": "Helvetica", "size": 16, "weight": "bold"},
+    "subtitle": {"family": "Helvetica", "size": 12, "weight": "bold"},
+    "text": {"family": "Helvetica", "size": 10},
+    "completed": {"family": "Helvetica", "size": 10, "overstrike": 1},
+    "mono": {"family": "Courier", "size": 8}
+}
+
+def font_description(name):
+    """Return a Tk font description of a named font, e.g. ("Helvetica", 16, "bold")
+    
+    Styles take descriptions, so configuring them creates no font objects.
+    """
+    options = FONTS[name]
+    description = (options["family"], options["size"])
+    if options.get("weight", "normal") != "normal":
+        description += (options["weight"],)
+    if options.get("overstrike"):
+        description += ("overstrike",)
+    return description
+
 class ThemeManager:
-    def __init__(self):
-        # Custom fonts
-        self.title_font = font.Font(family="Helvetica", size=16, weight="bold")
-        self.subtitle_font = font.Font(family="Helvetica", size=12, weight="bold")
-        self.text_font = font.Font(family="Helvetica", size=10)
+    def __init__(self, settings_file=None):
+        """Load the saved palette choice from settings_file, if given"""
+        self.settings_file = settings_file
+        
+        # Fonts by name, created on first use
+        self._fonts = {}
+        
+        # Treeviews whose row tags follow the palette
+        self._trees = []
+        
+        # Callbacks run after the palette changed
+        self._listeners = []
         
         # Set custom colors
-        self.colors = {
-            "bg_main": "#f5f5f5",
-            "bg_sidebar": "#3a4750",
-            "accent": "#00adb5",
-            "text_light": "#ffffff",
-            "text_dark": "#303841",
-            "high_priority": "#ff5252",
-            "medium_priority": "#ffb142",
-            "low_priority": "#2ed573"
-        }
+        self.theme = self.load_theme()
+        self.colors = dict(PALETTES[self.theme])
         
         # Configure the styles
+        self.style = ttk.Style()
         self.configure_styles()
     
+    def font(self, name):
+        """Return the shared font with the given name"""
+        cached = self._fonts.get(name)
+        if cached is None:
+            cached = self._fonts[name] = font.Font(**FONTS[name])
+        return cached
+    
+    @property
+    def title_font(self):
+        """Font of the window title"""
+        return self.font("title")
+    
+    @property
+    def subtitle_font(self):
+        """Font of section headings"""
+        return self.font("subtitle")
+    
+    @property
+    def text_font(self):
+        """Font of regular text"""
+        return self.font("text")
+    
+    def load_theme(self):
+        """Return the palette name stored in the settings file"""
+        if self.settings_file is None or not os.path.exists(self.settings_file):
+            return DEFAULT_THEME
+        try:
+            with open(self.settings_file, "r") as f:
+                theme = json.load(f).get("theme")
+        except (OSError, ValueError, AttributeError):
+            return DEFAULT_THEME
+        return theme if theme in PALETTES else DEFAULT_THEME
+    
+    def save_theme(self):
+        """Store the palette name in the settings file"""
+        if self.settings_file is None:
+            return
+        settings = {}
+        if os.path.exists(self.settings_file):
+            try:
+                with open(self.settings_file, "r") as f:
+                    settings = json.load(f)
+            except (OSError, ValueError):
+                settings = {}
+        settings["theme"] = self.theme
+        
+        temp_file = self.settings_file + ".tmp"
+        with open(temp_file, "w") as f:
+            json.dump(settings, f, indent=4)
+        os.replace(temp_file, self.settings_file)
+    
+    def set_theme(self, theme):
+        """Switch to another palette and remember the choice
+        
+        Styles and tags are reconfigured in place, so existing widgets pick
+        up the new colors without being rebuilt.
+        """
+        if theme not in PALETTES:
+            raise ValueError(f"Unknown theme: {theme}")
+        if theme == self.theme:
+            return
+        
+        self.theme = theme
+        # Update in place so components holding self.colors see the change
+        self.colors.update(PALETTES[theme])
+        self.configure_styles()
+        for tree in self._trees:
+            self.configure_tags(tree)
+        for callback in list(self._listeners):
+            callback()
+        self.save_theme()
+    
+    def next_theme(self):
+        """Return the name of the palette after the current one"""
+        names = list(PALETTES)
+        return names[(names.index(self.theme) + 1) % len(names)]
+    
+    def add_listener(self, callback):
+        """Register a callback to run after the palette changed"""
+        self._listeners.append(callback)
+    
+    def register_tree(self, tree):
+        """Style the row tags of a treeview and keep them following the palette"""
+        self._trees.append(tree)
+        tree.bind("<Destroy>", lambda event: self._forget_tree(tree), add="+")
+        self.configure_tags(tree)
+    
+    def _forget_tree(self, tree):
+        """Stop updating a destroyed treeview"""
+        if tree in self._trees:
+            self._trees.remove(tree)
+    
+    def configure_tags(self, tree):
+        """Configure the task row tags of a treeview"""
+        tree.tag_configure("high", foreground=self.colors["high_priority"])
+        tree.tag_configure("medium", foreground=self.colors["medium_priority"])
+        tree.tag_configure("low", foreground=self.colors["low_priority"])
+        tree.tag_configure("completed", font=self.font("completed"))
+    
     def configure_styles(self):
         """Configure the ttk styles with the theme colors"""
-        self.style = ttk.Style()
-        
         # Frame styles
         self.style.configure("TFrame", background=self.colors["bg_main"])
         self.style.configure("Sidebar.TFrame", background=self.colors["bg_sidebar"])
@@ -39,15 +187,18 @@ class ThemeManager:
         # Label styles
         self.style.configure("TLabel", background=self.colors["bg_main"], foreground=self.colors["text_dark"])
         self.style.configure("Sidebar.TLabel", background=self.colors["bg_sidebar"], foreground=self.colors["text_light"])
-        self.style.configure("Stats.TLabel", background=self.colors["bg_sidebar"], foreground=self.colors["text_light"], font=self.text_font)
-        self.style.configure("Title.TLabel", font=self.title_font, background=self.colors["bg_main"], foreground=self.colors["text_dark"])
+        self.style.configure("Stats.TLabel", background=self.colors["bg_sidebar"], foreground=self.colors["text_light"], font=font_description("text"))
+        self.style.configure("Title.TLabel", font=font_description("title"), background=self.colors["bg_main"], foreground=self.colors["text_dark"])
+        
+        # Radio buttons sit on the main background
+        self.style.configure("TRadiobutton", background=self.colors["bg_main"], foreground=self.colors["text_dark"])
         
         # Treeview styles
-        self.style.configure("Treeview", 
+        self.style.configure("Treeview",
                             background=self.colors["bg_main"],
                             foreground=self.colors["text_dark"],
                             rowheight=40,
                             fieldbackground=self.colors["bg_main"],
-                            font=self.text_font)
+                            font=font_description("text"))
         
-        self.style.map('Treeview', background=[('selected', self.colors["accent"])])
\ No newline at end of file
+        self.style.map('Treeview', background=[('selected', self.colors["accent"])])
@@ -1,34 +1,167 @@
 # todo_app.py - Main To-Do application class
 
 import tkinter as tk
-from tkinter import ttk, messagebox, font
+from tkinter import ttk, messagebox, filedialog, font
+from datetime import datetime
 
-from ui_components import SidebarComponent, TaskInputComponent, TaskListComponent
+from metrics import EventLoopProbe, metrics
+from reminder_scheduler import ReminderScheduler
+from startup_profiler import StartupProfiler
+from task_commands import execute
+from ui_components import (
+    SidebarComponent, TaskInputComponent, SearchBarComponent, TaskListComponent, VirtualTaskListComponent,
+    TransferProgressComponent
+)
 from task_manager import TaskManager
+from task_transfer import ExportJob, ImportJob
+from task_watcher import TaskWatcher
 from theme_manager import ThemeManager
 
+# Task count above which the list only materializes the visible rows
+VIRTUAL_LIST_THRESHOLD = 5000
+
+# How often (ms) to check for errors from the background save worker
+SAVE_ERROR_POLL_MS = 250
+
+# Tasks loaded per Tk loop iteration while the task file streams in
+LOAD_BATCH_SIZE = 5000
+
+# How often (ms) to check for tasks saved by other running instances
+WATCH_POLL_MS = 1000
+
+# How often (ms) to move old completed tasks to the archive
+ARCHIVE_INTERVAL_MS = 60 * 60 * 1000
+
+# How often (ms) to answer requests that arrived on the IPC socket
+IPC_POLL_MS = 100
+
+# How often (ms) to update the progress of an import or export; an
+# import commits at most one batch per update
+TRANSFER_POLL_MS = 50
+
+# File types offered by the import and export dialogs
+TRANSFER_FILE_TYPES = [("CSV files", "*.csv"), ("NDJSON files", "*.ndjson *.jsonl"), ("All files", "*.*")]
+
 class ToDoApp:
-    def __init__(self, root):
+    def __init__(self, root, engine="journal", profiler=None, metrics_file=None, archive_after_days=30, ipc=True):
         self.root = root
         self.root.title("Task Master - Your Personal To-Do Manager")
         self.root.geometry("800x600")
         self.root.minsize(650, 500)
         
+        # Times the startup phases when --profile-startup is given
+        self.profiler = profiler or StartupProfiler()
+        
+        # Where to write the collected metrics on exit, if anywhere
+        self.metrics_file = metrics_file
+        
+        # Age in days at which completed tasks are archived; 0 turns it off
+        self.archive_after_days = archive_after_days
+        
+        # Socket for cli.py, started once the tasks are loaded
+        self.ipc = ipc
+        self.ipc_server = None
+        EventLoopProbe(metrics, self.root.after).start()
+        
         # Initialize the theme manager
-        self.theme_manager = ThemeManager()
+        self.theme_manager = ThemeManager("settings.json")
+        self.theme_manager.add_listener(self.apply_theme)
+        self.profiler.mark("theme manager")
         
         # Initialize the task manager
-        self.task_manager = TaskManager("tasks.json")
-        self.task_manager.load_tasks()
+        self.task_manager = TaskManager("tasks.json", engine=engine)
+        self.task_watcher = TaskWatcher(self.task_manager)
+        
+        # One timer for the next due task, kept in step with task changes
+        self.reminders = ReminderScheduler(
+            self.task_manager,
+            self.root.after,
+            self.root.after_cancel,
+            self.show_reminders
+        )
+        self.profiler.mark("open storage")
+        
+        # Components built after the first frame
+        self.sidebar = None
+        self.search_bar = None
+        
+        # Running import or export and its tallies, if any
+        self.transfer = None
+        self.transfer_counts = None
+        
+        # Paint the empty window first so the user sees it right away
+        self.setup_shell()
+        self.root.update()
+        self.profiler.mark("paint shell")
+        
+        # Load the first screenful of tasks now and the rest in the background
+        self.task_loader = self.task_manager.iter_load_tasks(LOAD_BATCH_SIZE)
+        first_batch = self.load_batch()
+        self.profiler.mark("load first batch")
         
         # Setup the UI
-        self.setup_ui()
+        self.setup_ui(more_tasks=first_batch >= LOAD_BATCH_SIZE)
+        self.profiler.mark("build task list")
         
-        # Configure the row and column weights to make the UI responsive
-        self.root.grid_rowconfigure(1, weight=1)
-        self.root.grid_columnconfigure(1, weight=1)
+        # Undo and redo task changes from anywhere in the main window; not
+        # from dialogs, whose task could change under them
+        for sequence in ("<Control-z>", "<Control-Z>"):
+            self.root.bind_all(sequence, lambda event: self.in_main_window(event) and self.undo())
+        for sequence in ("<Control-y>", "<Control-Y>"):
+            self.root.bind_all(sequence, lambda event: self.in_main_window(event) and self.redo())
+        
+        # Flush pending writes before the window closes
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Report errors from the background save worker
+        self.check_save_errors()
+        
+        # Secondary panels and the remaining tasks follow once the list shows
+        self.root.after(1, self.setup_secondary_ui)
+        if first_batch:
+            self.root.after(1, self.load_remaining_tasks)
+        else:
+            self.root.after(1, self.finish_startup)
     
-    def setup_ui(self):
+    def load_batch(self):
+        """Load the next batch of tasks; return its size, 0 when done"""
+        try:
+            with metrics.timer("load_batch"):
+                return next(self.task_loader, 0)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load tasks: {str(e)}")
+            self.task_manager.reset_tasks()
+            return 0
+    
+    def load_remaining_tasks(self):
+        """Load one batch per Tk loop iteration until all tasks are in"""
+        if self.load_batch():
+            self.root.after(1, self.load_remaining_tasks)
+        else:
+            self.finish_startup()
+        self.update_statistics()
+    
+    def finish_startup(self):
+        """Report the startup profile and start the background checks"""
+        self.profiler.mark("load remaining tasks")
+        self.profiler.report()
+        self.use_task_list_for_size()
+        self.root.after(WATCH_POLL_MS, self.check_external_changes)
+        if self.archive_after_days:
+            self.root.after(1, self.archive_old_tasks)
+        if self.ipc:
+            # Imported here so asyncio stays off the cold-start path
+            from ipc_server import IpcServer
+            
+            self.ipc_server = IpcServer("tasks.json.sock")
+            try:
+                if self.ipc_server.start():
+                    self.check_ipc_requests()
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to open the command socket: {str(e)}")
+    
+    def setup_shell(self):
+        """Create the header and the empty main area"""
         # App header
         self.header_frame = ttk.Frame(self.root, style="TFrame", padding=(10, 10))
         self.header_frame.grid(row=0, column=0, columnspan=2, sticky="ew")
@@ -42,7 +175,6 @@ class ToDoApp:
         self.title_label.pack(side=tk.LEFT, padx=10)
         
         # Current date display
-        from datetime import datetime
         current_date = datetime.now().strftime("%A, %B %d, %Y")
         self.date_label = ttk.Label(
             self.header_frame, 
@@ -51,19 +183,33 @@ class ToDoApp:
         )
         self.date_label.pack(side=tk.RIGHT, padx=10)
         
-        # Create the sidebar component
-        self.sidebar = SidebarComponent(
-            self.root, 
-            self.theme_manager, 
-            self.task_manager,
-            self.update_statistics
+        # Switches between the light and dark palettes
+        self.theme_button = ttk.Button(
+            self.header_frame, 
+            text=self.theme_button_text(), 
+            command=self.toggle_theme
         )
-        self.sidebar.frame.grid(row=1, column=0, sticky="ns")
+        self.theme_button.pack(side=tk.RIGHT, padx=10)
+        
+        # Bulk transfer of tasks from and to CSV or NDJSON files
+        self.export_button = ttk.Button(self.header_frame, text="Export", command=self.export_tasks)
+        self.export_button.pack(side=tk.RIGHT)
+        
+        self.import_button = ttk.Button(self.header_frame, text="Import", command=self.import_tasks)
+        self.import_button.pack(side=tk.RIGHT, padx=(0, 5))
         
         # Main content area
         self.main_frame = ttk.Frame(self.root, style="TFrame", padding=(20, 10))
         self.main_frame.grid(row=1, column=1, sticky="nsew")
         
+        self.root.configure(background=self.theme_manager.colors["bg_main"])
+        
+        # Configure the row and column weights to make the UI responsive
+        self.root.grid_rowconfigure(1, weight=1)
+        self.root.grid_columnconfigure(1, weight=1)
+    
+    def setup_ui(self, more_tasks=False):
+        """Create the task input and the task list"""
         # Task input component
         self.task_input = TaskInputComponent(
             self.main_frame, 
@@ -73,8 +219,14 @@ class ToDoApp:
         )
         self.task_input.frame.pack(fill=tk.X, pady=(0, 10))
         
-        # Task list component
-        self.task_list = TaskListComponent(
+        # Task list component; many top-level tasks need the windowed list.
+        # While tasks still stream in their shape is unknown, so start
+        # windowed and let finish_startup switch to the tree if it fits
+        if more_tasks or self.task_manager.count_top_level_tasks() >= VIRTUAL_LIST_THRESHOLD:
+            task_list_class = VirtualTaskListComponent
+        else:
+            task_list_class = TaskListComponent
+        self.task_list = task_list_class(
             self.main_frame, 
             self.theme_manager, 
             self.task_manager,
@@ -82,14 +234,267 @@ class ToDoApp:
         )
         self.task_list.frame.pack(fill=tk.BOTH, expand=True)
         
+        # Progress of imports and exports, shown while one runs
+        self.transfer_progress = TransferProgressComponent(
+            self.main_frame, 
+            self.theme_manager, 
+            self.cancel_transfer
+        )
+        
         # Initial UI refresh
+        self.task_list.refresh_task_list()
+    
+    def setup_secondary_ui(self):
+        """Create the sidebar and the search bar after the first frame"""
+        # Create the sidebar component
+        self.sidebar = SidebarComponent(
+            self.root, 
+            self.theme_manager, 
+            self.task_manager,
+            self.update_statistics
+        )
+        self.sidebar.frame.grid(row=1, column=0, sticky="ns")
+        
+        # Search and filter bar, between the task input and the list
+        self.search_bar = SearchBarComponent(
+            self.main_frame, 
+            self.theme_manager, 
+            self.task_manager,
+            self.apply_filter
+        )
+        self.search_bar.frame.pack(fill=tk.X, pady=(0, 10), before=self.task_list.frame)
+        
         self.refresh_ui()
+        self.profiler.mark("build sidebar and search")
+    
+    def theme_button_text(self):
+        """Label of the theme button, naming the palette it switches to"""
+        return f"{self.theme_manager.next_theme().capitalize()} Mode"
+    
+    def toggle_theme(self):
+        """Switch to the next palette"""
+        try:
+            self.theme_manager.set_theme(self.theme_manager.next_theme())
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save the theme setting: {str(e)}")
+    
+    def apply_theme(self):
+        """Recolor the parts of the window that ttk styles don't cover"""
+        self.root.configure(background=self.theme_manager.colors["bg_main"])
+        self.theme_button.config(text=self.theme_button_text())
+    
+    def in_main_window(self, event):
+        """Check whether a key event came from a widget of the main window"""
+        widget = event.widget
+        return hasattr(widget, "winfo_toplevel") and widget.winfo_toplevel() is self.root
+    
+    def undo(self):
+        """Revert the last task change"""
+        if self.task_manager.undo():
+            # Undoing a large delete can bring back many rows
+            self.use_task_list_for_size()
+            self.refresh_ui()
+    
+    def redo(self):
+        """Apply the last undone task change again"""
+        if self.task_manager.redo():
+            self.use_task_list_for_size()
+            self.refresh_ui()
     
     def refresh_ui(self):
-        """Refresh all UI components when tasks change"""
-        self.task_list.refresh_task_list()
+        """Refresh UI components when tasks change
+        
+        The task list follows task manager change events by itself.
+        """
         self.update_statistics()
     
+    def apply_filter(self, criteria):
+        """Filter the task list by the search bar criteria"""
+        self.task_list.set_filter(criteria)
+        if not self.use_task_list_for_size():
+            self.task_list.refresh_task_list()
+    
     def update_statistics(self):
         """Update the statistics in the sidebar"""
-        self.sidebar.update_statistics()
\ No newline at end of file
+        if self.sidebar is not None:
+            self.sidebar.update_statistics()
+    
+    def check_external_changes(self):
+        """Reload tasks changed by other instances, then poll again"""
+        if self.task_watcher.poll():
+            self.use_task_list_for_size()
+            self.refresh_ui()
+        self.root.after(WATCH_POLL_MS, self.check_external_changes)
+    
+    def archive_old_tasks(self):
+        """Move old completed tasks to the archive, then check again later"""
+        try:
+            if self.task_manager.archive_completed(self.archive_after_days):
+                self.use_task_list_for_size()
+                self.refresh_ui()
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to archive tasks: {str(e)}")
+        self.root.after(ARCHIVE_INTERVAL_MS, self.archive_old_tasks)
+    
+    def check_ipc_requests(self):
+        """Run the commands sent by cli.py, then poll again"""
+        if not self.ipc_server.pending.empty():
+            self.ipc_server.handle_pending(lambda request: execute(self.task_manager, request))
+            self.use_task_list_for_size()
+            self.refresh_ui()
+        self.root.after(IPC_POLL_MS, self.check_ipc_requests)
+    
+    def import_tasks(self):
+        """Ask for a CSV or NDJSON file and import it in the background"""
+        path = filedialog.askopenfilename(title="Import Tasks", filetypes=TRANSFER_FILE_TYPES)
+        if path:
+            try:
+                self.start_transfer(ImportJob(path), "Importing")
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Error", f"Failed to import tasks: {str(e)}")
+    
+    def export_tasks(self):
+        """Ask for a file name and export all tasks in the background"""
+        path = filedialog.asksaveasfilename(
+            title="Export Tasks", 
+            filetypes=TRANSFER_FILE_TYPES, 
+            defaultextension=".csv"
+        )
+        if path:
+            try:
+                self.start_transfer(ExportJob(path, self.task_manager.tasks), "Exporting")
+            except ValueError as e:
+                messagebox.showerror("Error", f"Failed to export tasks: {str(e)}")
+    
+    def start_transfer(self, job, verb):
+        """Run an import or export job with the progress bar showing"""
+        self.transfer = job
+        self.transfer_counts = {"verb": verb, "imported": 0, "skipped": 0}
+        self.import_button.state(["disabled"])
+        self.export_button.state(["disabled"])
+        self.transfer_progress.set_progress(0.0, f"{verb}…")
+        self.transfer_progress.frame.pack(fill=tk.X, pady=(10, 0), after=self.task_list.frame)
+        job.start()
+        self.root.after(TRANSFER_POLL_MS, self.check_transfer)
+    
+    def cancel_transfer(self):
+        """Stop the running import or export"""
+        if self.transfer is not None:
+            self.transfer.cancel()
+    
+    def check_transfer(self):
+        """Commit the next imported batch and update the progress bar"""
+        job = self.transfer
+        counts = self.transfer_counts
+        
+        # Checked before taking a batch: a finished worker has queued them all
+        finished = job.done()
+        
+        if isinstance(job, ImportJob):
+            batch = None if job.cancelled() else job.next_batch()
+            if batch is not None:
+                finished = False
+                self.use_task_list_for_size(len(batch))
+                imported, skipped = self.task_manager.import_tasks(batch)
+                counts["imported"] += imported
+                counts["skipped"] += skipped
+                self.refresh_ui()
+            text = f"{counts['verb']}… {counts['imported']} tasks"
+        else:
+            text = f"{counts['verb']}… {job.written} of {len(job.tasks)} tasks"
+        self.transfer_progress.set_progress(job.progress(), text)
+        
+        if finished:
+            self.finish_transfer()
+        else:
+            self.root.after(TRANSFER_POLL_MS, self.check_transfer)
+    
+    def finish_transfer(self):
+        """Hide the progress bar and report how the transfer went"""
+        job, self.transfer = self.transfer, None
+        counts, self.transfer_counts = self.transfer_counts, None
+        self.transfer_progress.frame.pack_forget()
+        self.import_button.state(["!disabled"])
+        self.export_button.state(["!disabled"])
+        self.use_task_list_for_size()
+        
+        if job.error is not None:
+            messagebox.showerror("Error", f"{counts['verb']} failed: {str(job.error)}")
+        elif isinstance(job, ImportJob):
+            skipped = counts["skipped"] + job.duplicates
+            message = f"Imported {counts['imported']} tasks."
+            if job.cancelled():
+                message = f"Import cancelled. {message}"
+            if skipped:
+                message += f"\n{skipped} tasks with IDs that already exist were skipped."
+            if job.invalid:
+                message += f"\n{job.invalid} unreadable records were skipped."
+            messagebox.showinfo("Import", message)
+        elif not job.cancelled():
+            messagebox.showinfo("Export", f"Exported {job.written} tasks to {job.path}.")
+    
+    def use_task_list_for_size(self, incoming=0):
+        """Swap between the task tree and the windowed list by row count
+        
+        The tree shows the top-level tasks, or every match of a filter as
+        a flat list. incoming tasks about to be added count as rows. Returns
+        True if the list was swapped (and filled).
+        """
+        if self.task_list.filter:
+            rows = len(self.task_list.filtered_tasks())
+        else:
+            rows = self.task_manager.count_top_level_tasks()
+        if rows + incoming >= VIRTUAL_LIST_THRESHOLD:
+            task_list_class = VirtualTaskListComponent
+        else:
+            task_list_class = TaskListComponent
+        if type(self.task_list) is task_list_class:
+            return False
+        
+        old_list = self.task_list
+        self.task_list = task_list_class(
+            self.main_frame, 
+            self.theme_manager, 
+            self.task_manager,
+            self.refresh_ui
+        )
+        self.task_list.frame.pack(fill=tk.BOTH, expand=True, before=old_list.frame)
+        self.task_list.filter = old_list.filter
+        self.task_list.matches = old_list.matches
+        old_list.destroy()
+        self.task_list.refresh_task_list()
+        return True
+    
+    def show_reminders(self, tasks):
+        """Tell the user which tasks have come due"""
+        self.root.bell()
+        lines = [f"• {task.description} (due {task.due_date})" for task in tasks[:10]]
+        if len(tasks) > 10:
+            lines.append(f"…and {len(tasks) - 10} more")
+        messagebox.showinfo("Reminder", "Tasks due:\n" + "\n".join(lines))
+    
+    def check_save_errors(self):
+        """Show errors raised by the save worker, then poll again"""
+        self.show_save_errors()
+        self.root.after(SAVE_ERROR_POLL_MS, self.check_save_errors)
+    
+    def show_save_errors(self):
+        """Show an error dialog for every failed save"""
+        for error in self.task_manager.get_save_errors():
+            messagebox.showerror("Error", f"Failed to save tasks: {str(error)}")
+    
+    def on_close(self):
+        """Write pending changes, close the task storage and destroy the window"""
+        self.task_loader.close()
+        if self.transfer is not None:
+            self.transfer.cancel()
+        if self.ipc_server is not None:
+            self.ipc_server.close()
+        self.task_manager.close()
+        self.show_save_errors()
+        if self.metrics_file:
+            try:
+                metrics.dump(self.metrics_file)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to write metrics: {str(e)}")
+        self.root.destroy()
\ No newline at end of file
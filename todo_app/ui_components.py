@@ -1,9 +1,16 @@
 # ui_components.py - Reusable UI components for the To-Do application
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
+from datetime import datetime, timedelta
+from bisect import bisect_left
 import random
 
+from metrics import metrics
+from task import format_timestamp
+from task_analytics import format_duration
+from task_manager import TaskValidationError
+
 class SidebarComponent:
     def __init__(self, parent, theme_manager, task_manager, update_callback):
         self.theme_manager = theme_manager
@@ -34,6 +41,9 @@ class SidebarComponent:
         self.high_priority_label = ttk.Label(self.frame, text="High Priority: 0", style="Stats.TLabel")
         self.high_priority_label.pack(anchor="w", pady=2)
         
+        self.archived_tasks_label = ttk.Label(self.frame, text="Archived: 0", style="Stats.TLabel")
+        self.archived_tasks_label.pack(anchor="w", pady=2)
+        
         # Motivational quotes
         self.quotes = [
             "The secret of getting ahead is getting started.",
@@ -72,21 +82,342 @@ class SidebarComponent:
             style="Clear.TButton"
         )
         self.clear_all_button.pack(pady=10, fill=tk.X)
+        
+        # Browse the tasks moved to the archive
+        self.archive_button = ttk.Button(
+            self.frame, 
+            text="Archive", 
+            command=self.show_archive
+        )
+        self.archive_button.pack(pady=(0, 10), fill=tk.X)
+        
+        # Daily throughput chart
+        self.analytics_button = ttk.Button(
+            self.frame, 
+            text="Analytics", 
+            command=self.show_analytics
+        )
+        self.analytics_button.pack(pady=(0, 10), fill=tk.X)
+        
+        # Performance overlay, hidden until toggled
+        self.performance_button = ttk.Button(
+            self.frame, 
+            text="Show Performance", 
+            command=self.toggle_performance
+        )
+        self.performance_button.pack(fill=tk.X)
+        
+        self.performance_label = ttk.Label(
+            self.frame, 
+            style="Stats.TLabel", 
+            font=self.theme_manager.font("mono"), 
+            justify=tk.LEFT
+        )
+        self.performance_job = None
     
     def clear_completed_tasks(self):
-        """Clear completed tasks and update the UI"""
-        if messagebox.askyesno("Confirm", "Are you sure you want to remove all completed tasks?"):
-            if self.task_manager.clear_completed_tasks():
-                self.update_callback()
+        """Clear completed tasks and update the UI (Ctrl+Z brings them back)"""
+        if self.task_manager.clear_completed_tasks():
+            self.update_callback()
+        else:
+            messagebox.showinfo("Info", "No completed tasks to clear.")
+    
+    def show_archive(self):
+        """Open the archive view"""
+        ArchiveViewComponent(self.frame, self.theme_manager, self.task_manager.archive)
+    
+    def show_analytics(self):
+        """Open the analytics view"""
+        AnalyticsViewComponent(self.frame, self.theme_manager, self.task_manager)
+    
+    def toggle_performance(self):
+        """Show or hide the performance overlay"""
+        if self.performance_job is None:
+            self.performance_button.config(text="Hide Performance")
+            self.performance_label.pack(anchor="w", pady=(10, 0))
+            self.update_performance()
+        else:
+            self.frame.after_cancel(self.performance_job)
+            self.performance_job = None
+            self.performance_label.pack_forget()
+            self.performance_button.config(text="Show Performance")
     
+    def update_performance(self):
+        """Show the latest latency percentiles, then refresh again in a second"""
+        snapshot = metrics.snapshot()
+        lines = [f"{'ms':<14}{'p50':>6}{'p95':>6}{'p99':>6}"]
+        for name, summary in snapshot["operations"].items():
+            lines.append(
+                f"{name[:14]:<14}{summary['p50_ms']:>6.1f}{summary['p95_ms']:>6.1f}{summary['p99_ms']:>6.1f}"
+            )
+        for name, value in sorted(snapshot["gauges"].items()):
+            lines.append(f"{name[:14]:<14}{value:>18}")
+        
+        self.performance_label.config(text="\n".join(lines))
+        self.performance_job = self.frame.after(1000, self.update_performance)
+    
+    @metrics.timed("update_statistics")
     def update_statistics(self):
         """Update the statistics labels with current data"""
         stats = self.task_manager.get_statistics()
+        metrics.set_gauge("tasks", stats["total"])
         
         self.total_tasks_label.config(text=f"Total Tasks: {stats['total']}")
         self.completed_tasks_label.config(text=f"Completed: {stats['completed']}")
         self.pending_tasks_label.config(text=f"Pending: {stats['pending']}")
         self.high_priority_label.config(text=f"High Priority: {stats['high_priority']}")
+        
+        # Read from the archive summary, not by scanning the archive
+        self.archived_tasks_label.config(text=f"Archived: {self.task_manager.archive.count()}")
+
+
+class ArchiveViewComponent:
+    """Window listing archived tasks, newest first, one page at a time
+    
+    Only the page on screen is read from the archive; the page count and
+    totals come from the archive summary.
+    """
+    
+    def __init__(self, parent, theme_manager, archive):
+        self.theme_manager = theme_manager
+        self.archive = archive
+        
+        # Page shown, counted from the newest
+        self.page = 0
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("Archive")
+        self.window.geometry("700x450")
+        self.window.transient(parent.winfo_toplevel())
+        self.window.configure(bg=self.theme_manager.colors["bg_main"])
+        
+        self.frame = ttk.Frame(self.window, style="TFrame", padding=(10, 10))
+        self.frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Page navigation
+        nav_frame = ttk.Frame(self.frame, style="TFrame")
+        nav_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.newer_button = ttk.Button(nav_frame, text="< Newer", command=lambda: self.show_page(self.page - 1))
+        self.newer_button.pack(side=tk.LEFT)
+        
+        self.older_button = ttk.Button(nav_frame, text="Older >", command=lambda: self.show_page(self.page + 1))
+        self.older_button.pack(side=tk.LEFT, padx=5)
+        
+        self.page_label = ttk.Label(nav_frame, style="TLabel")
+        self.page_label.pack(side=tk.LEFT, padx=10)
+        
+        # Archived tasks on the current page
+        scrollbar = ttk.Scrollbar(self.frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.task_tree = ttk.Treeview(
+            self.frame, 
+            columns=("task", "priority", "date", "completed"), 
+            show="headings",
+            yscrollcommand=scrollbar.set
+        )
+        self.task_tree.heading("task", text="Task Description")
+        self.task_tree.heading("priority", text="Priority")
+        self.task_tree.heading("date", text="Created")
+        self.task_tree.heading("completed", text="Completed")
+        
+        self.task_tree.column("task", width=300)
+        self.task_tree.column("priority", width=80)
+        self.task_tree.column("date", width=120)
+        self.task_tree.column("completed", width=120)
+        
+        self.task_tree.pack(fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.task_tree.yview)
+        self.theme_manager.register_tree(self.task_tree)
+        
+        self.show_page(0)
+    
+    @metrics.timed("archive_page")
+    def show_page(self, page):
+        """Read one page from the archive and show it"""
+        page_count = self.archive.page_count()
+        self.page = max(0, min(page, page_count - 1))
+        
+        # The archive stores pages oldest first
+        tasks = self.archive.read_page(page_count - 1 - self.page) if page_count else []
+        tasks.reverse()
+        
+        self.task_tree.delete(*self.task_tree.get_children())
+        for task in tasks:
+            completed = format_timestamp(task.completed_at) if task.completed_at is not None else ""
+            self.task_tree.insert(
+                "", tk.END, 
+                values=(task.description, task.priority.capitalize(), task.date_created, completed), 
+                tags=(task.priority, "completed")
+            )
+        
+        self.page_label.config(
+            text=f"Page {self.page + 1 if page_count else 0} of {page_count} – {self.archive.count()} archived tasks"
+        )
+        self.newer_button.state(["!disabled" if self.page > 0 else "disabled"])
+        self.older_button.state(["!disabled" if self.page < page_count - 1 else "disabled"])
+
+
+class AnalyticsViewComponent:
+    """Window charting tasks created and completed per day
+    
+    Everything shown comes from TaskManager.get_analytics, which reads the
+    precomputed daily buckets, so redrawing after each task change costs
+    the same for ten tasks as for a hundred thousand.
+    """
+    
+    # Options of the range selector and the days they cover
+    RANGES = {"Last 14 days": 14, "Last 30 days": 30, "Last 90 days": 90}
+    
+    def __init__(self, parent, theme_manager, task_manager):
+        self.theme_manager = theme_manager
+        self.task_manager = task_manager
+        
+        # Pending after_idle redraw, so a burst of changes draws once
+        self.redraw_job = None
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("Analytics")
+        self.window.geometry("700x420")
+        self.window.transient(parent.winfo_toplevel())
+        self.window.configure(bg=self.theme_manager.colors["bg_main"])
+        
+        self.frame = ttk.Frame(self.window, style="TFrame", padding=(10, 10))
+        self.frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Range selector and legend
+        top_frame = ttk.Frame(self.frame, style="TFrame")
+        top_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.range_var = tk.StringVar(value="Last 30 days")
+        range_combo = ttk.Combobox(
+            top_frame, 
+            textvariable=self.range_var, 
+            values=list(self.RANGES), 
+            state="readonly", 
+            width=14
+        )
+        range_combo.pack(side=tk.LEFT)
+        range_combo.bind("<<ComboboxSelected>>", lambda event: self.schedule_redraw())
+        
+        ttk.Label(top_frame, text="■ Created", foreground=self.theme_manager.colors["accent"]).pack(side=tk.LEFT, padx=(15, 5))
+        ttk.Label(top_frame, text="■ Completed", foreground=self.theme_manager.colors["low_priority"]).pack(side=tk.LEFT)
+        
+        # Totals and the median time to complete over the range
+        self.summary_label = ttk.Label(self.frame, style="TLabel", justify=tk.LEFT)
+        self.summary_label.pack(side=tk.BOTTOM, anchor="w", pady=(10, 0))
+        
+        self.canvas = tk.Canvas(self.frame, bg=self.theme_manager.colors["bg_main"], highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind("<Configure>", lambda event: self.schedule_redraw())
+        
+        # Follow task changes while the window is open
+        self.task_manager.add_listener(self.on_tasks_changed)
+        self.window.bind("<Destroy>", self.on_destroy)
+    
+    def on_tasks_changed(self, event):
+        self.schedule_redraw()
+    
+    def on_destroy(self, event):
+        """Stop following task changes once the window closes"""
+        # Destroy events of the child widgets arrive here as well
+        if event.widget is self.window:
+            self.task_manager.remove_listener(self.on_tasks_changed)
+    
+    def schedule_redraw(self):
+        """Redraw once the current burst of events has been handled"""
+        if self.redraw_job is None:
+            self.redraw_job = self.window.after_idle(self.redraw)
+    
+    @metrics.timed("analytics_render")
+    def redraw(self):
+        """Draw the chart and the summary from the daily aggregates"""
+        self.redraw_job = None
+        analytics = self.task_manager.get_analytics(self.RANGES[self.range_var.get()])
+        self.draw_chart(analytics)
+        
+        lines = []
+        for key, title in (("created", "Created"), ("completed", "Completed")):
+            by_priority = analytics[f"{key}_by_priority"]
+            detail = ", ".join(
+                f"{by_priority[priority]} {priority}" for priority in ("high", "medium", "low") if priority in by_priority
+            )
+            lines.append(f"{title}: {sum(analytics[key])}" + (f" ({detail})" if detail else ""))
+        median = analytics["median_completion"]
+        lines.append(f"Median time to complete: {format_duration(median) if median is not None else 'n/a'}")
+        self.summary_label.config(text="\n".join(lines))
+    
+    def draw_chart(self, analytics):
+        """Draw a pair of bars per day: created and completed"""
+        colors = self.theme_manager.colors
+        canvas = self.canvas
+        canvas.delete("all")
+        canvas.configure(bg=colors["bg_main"])
+        
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+        left, right, top, bottom = 40, 10, 10, 25
+        plot_width = width - left - right
+        plot_height = height - top - bottom
+        if plot_width <= 0 or plot_height <= 0:
+            return
+        
+        days = analytics["days"]
+        peak = max(analytics["created"] + analytics["completed"] + [1])
+        slot = plot_width / len(days)
+        bar = max(1.0, slot * 0.4)
+        font = self.theme_manager.text_font
+        
+        # Axes and the scale
+        canvas.create_line(left, top, left, top + plot_height, left + plot_width, top + plot_height, fill=colors["text_dark"])
+        canvas.create_text(left - 5, top, text=str(peak), anchor="ne", fill=colors["text_dark"], font=font)
+        canvas.create_text(left - 5, top + plot_height, text="0", anchor="se", fill=colors["text_dark"], font=font)
+        
+        # About eight date labels whatever the range
+        label_every = max(1, len(days) // 8)
+        for index, day in enumerate(days):
+            x = left + index * slot + (slot - 2 * bar) / 2
+            for offset, key, color in ((0, "created", colors["accent"]), (bar, "completed", colors["low_priority"])):
+                value = analytics[key][index]
+                if value:
+                    bar_height = plot_height * value / peak
+                    canvas.create_rectangle(
+                        x + offset, top + plot_height - bar_height, x + offset + bar, top + plot_height,
+                        fill=color, outline=""
+                    )
+            if (len(days) - 1 - index) % label_every == 0:
+                canvas.create_text(
+                    left + index * slot + slot / 2, top + plot_height + 4, 
+                    text=day[5:], anchor="n", fill=colors["text_dark"], font=font
+                )
+
+
+class TransferProgressComponent:
+    """Progress bar with a Cancel button for a running import or export
+    
+    The frame is packed by the owner while a transfer runs; the bar only
+    shows values the owner passes in, so it never blocks the window.
+    """
+    
+    def __init__(self, parent, theme_manager, cancel_callback):
+        self.theme_manager = theme_manager
+        
+        self.frame = ttk.Frame(parent, style="TFrame")
+        
+        self.label = ttk.Label(self.frame, style="TLabel", width=40)
+        self.label.pack(side=tk.LEFT)
+        
+        self.progress_bar = ttk.Progressbar(self.frame, mode="determinate", maximum=100)
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
+        
+        self.cancel_button = ttk.Button(self.frame, text="Cancel", command=cancel_callback)
+        self.cancel_button.pack(side=tk.LEFT)
+    
+    def set_progress(self, fraction, text):
+        """Show a finished fraction from 0.0 to 1.0 and a status text"""
+        self.progress_bar["value"] = fraction * 100
+        self.label.config(text=text)
 
 
 class TaskInputComponent:
@@ -114,6 +445,15 @@ class TaskInputComponent:
         ttk.Radiobutton(priority_frame, text="Medium", variable=self.priority_var, value="medium").pack(side=tk.LEFT)
         ttk.Radiobutton(priority_frame, text="Low", variable=self.priority_var, value="low").pack(side=tk.LEFT)
         
+        # Optional due date
+        due_frame = ttk.Frame(self.frame, style="TFrame")
+        due_frame.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(due_frame, text="Due:", style="TLabel").pack(side=tk.LEFT)
+        self.due_entry = ttk.Entry(due_frame, font=self.theme_manager.text_font, width=16)
+        self.due_entry.pack(side=tk.LEFT)
+        self.due_entry.bind("<Return>", lambda event: self.add_task())
+        
         # Add task button
         self.add_button = ttk.Button(self.frame, text="Add Task", command=self.add_task)
         self.add_button.pack(side=tk.LEFT, padx=5)
@@ -121,55 +461,182 @@ class TaskInputComponent:
     def add_task(self):
         """Add a new task and update the UI"""
         task_text = self.task_entry.get()
-        if self.task_manager.add_task(task_text, self.priority_var.get()):
-            # Clear the entry field
-            self.task_entry.delete(0, tk.END)
-            # Update the UI
-            self.update_callback()
+        try:
+            self.task_manager.add_task(task_text, self.priority_var.get(), self.due_entry.get())
+        except TaskValidationError as e:
+            messagebox.showwarning("Warning", str(e))
+            return
+        
+        # Clear the entry fields
+        self.task_entry.delete(0, tk.END)
+        self.due_entry.delete(0, tk.END)
+        # Update the UI
+        self.update_callback()
 
 
+class SearchBarComponent:
+    # Options of the "Created" filter and how many days back they reach
+    CREATED_RANGES = {"Any time": None, "Today": 0, "Last 7 days": 7, "Last 30 days": 30}
+    
+    def __init__(self, parent, theme_manager, task_manager, filter_callback):
+        self.theme_manager = theme_manager
+        self.task_manager = task_manager
+        self.filter_callback = filter_callback
+        
+        # Create the search frame
+        self.frame = ttk.Frame(parent, style="TFrame")
+        
+        # Search entry field
+        ttk.Label(self.frame, text="Search:", style="TLabel").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(self.frame, textvariable=self.search_var, font=self.theme_manager.text_font, width=30)
+        self.search_entry.pack(side=tk.LEFT, padx=(5, 10), fill=tk.X, expand=True)
+        self.search_entry.bind("<Escape>", lambda event: self.clear())
+        
+        # Facet selection
+        self.priority_var = tk.StringVar(value="All")
+        ttk.Label(self.frame, text="Priority:", style="TLabel").pack(side=tk.LEFT)
+        ttk.Combobox(
+            self.frame,
+            textvariable=self.priority_var,
+            values=("All", "High", "Medium", "Low"),
+            state="readonly",
+            width=8
+        ).pack(side=tk.LEFT, padx=(5, 10))
+        
+        self.status_var = tk.StringVar(value="All")
+        ttk.Label(self.frame, text="Status:", style="TLabel").pack(side=tk.LEFT)
+        ttk.Combobox(
+            self.frame,
+            textvariable=self.status_var,
+            values=("All", "Pending", "Completed"),
+            state="readonly",
+            width=10
+        ).pack(side=tk.LEFT, padx=(5, 10))
+        
+        self.created_var = tk.StringVar(value="Any time")
+        ttk.Label(self.frame, text="Created:", style="TLabel").pack(side=tk.LEFT)
+        ttk.Combobox(
+            self.frame,
+            textvariable=self.created_var,
+            values=tuple(self.CREATED_RANGES),
+            state="readonly",
+            width=12
+        ).pack(side=tk.LEFT, padx=(5, 10))
+        
+        # Clear button
+        ttk.Button(self.frame, text="Clear", command=self.clear).pack(side=tk.LEFT)
+        
+        # Filter on every keystroke and facet change
+        for variable in (self.search_var, self.priority_var, self.status_var, self.created_var):
+            variable.trace_add("write", lambda *args: self.apply_filter())
+    
+    def get_criteria(self):
+        """Return the search_tasks arguments for the current input, or None"""
+        criteria = {}
+        if self.search_var.get().strip():
+            criteria["text"] = self.search_var.get()
+        if self.priority_var.get() != "All":
+            criteria["priority"] = self.priority_var.get().lower()
+        if self.status_var.get() != "All":
+            criteria["status"] = self.status_var.get().lower()
+        
+        days = self.CREATED_RANGES.get(self.created_var.get())
+        if days is not None:
+            criteria["created_since"] = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        return criteria or None
+    
+    def apply_filter(self):
+        """Pass the current filter to the task list"""
+        self.filter_callback(self.get_criteria())
+    
+    def clear(self):
+        """Reset the search text and all facets"""
+        self.search_var.set("")
+        self.priority_var.set("All")
+        self.status_var.set("All")
+        self.created_var.set("Any time")
+
+
+# Prefix of the dummy row that gives an unexpanded task its expand arrow
+PLACEHOLDER_PREFIX = "placeholder:"
+
 class TaskListComponent:
+    """Tree of tasks whose subtasks are only inserted once expanded
+    
+    Only top-level tasks get rows up front. A task with subtasks gets a
+    placeholder child so Tk draws the expand arrow; opening it replaces
+    the placeholder with the real subtasks. A search shows the matching
+    tasks as a flat list.
+    """
+    
     def __init__(self, parent, theme_manager, task_manager, update_callback):
         self.theme_manager = theme_manager
         self.task_manager = task_manager
         self.update_callback = update_callback
         
+        # search_tasks arguments of the active filter, or None for all tasks,
+        # and its matches once searched (reset by every task change)
+        self.filter = None
+        self.matches = None
+        
+        # Tasks whose subtask rows have been inserted
+        self.expanded = set()
+        
         # Create the list frame
         self.frame = ttk.Frame(parent, style="TFrame")
         
         # Create a scrollbar
-        scrollbar = ttk.Scrollbar(self.frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar = ttk.Scrollbar(self.frame)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         # Create the treeview for tasks
         self.task_tree = ttk.Treeview(
             self.frame, 
-            columns=("task", "priority", "date", "status"), 
-            show="headings",
-            yscrollcommand=scrollbar.set
+            columns=("task", "priority", "date", "due", "status", "progress"), 
+            show="tree headings",
+            selectmode="extended",
+            yscrollcommand=self.scrollbar.set
         )
         
         # Set column headings
         self.task_tree.heading("task", text="Task Description")
         self.task_tree.heading("priority", text="Priority")
         self.task_tree.heading("date", text="Created")
+        self.task_tree.heading("due", text="Due")
         self.task_tree.heading("status", text="Status")
+        self.task_tree.heading("progress", text="Subtasks")
         
-        # Configure column widths
+        # Configure column widths; the tree column only holds the expand arrow
+        self.task_tree.column("#0", width=40, stretch=False)
         self.task_tree.column("task", width=300)
         self.task_tree.column("priority", width=80)
         self.task_tree.column("date", width=120)
+        self.task_tree.column("due", width=120)
         self.task_tree.column("status", width=100)
+        self.task_tree.column("progress", width=70)
         
         # Pack the treeview and configure the scrollbar
         self.task_tree.pack(fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.task_tree.yview)
+        self.scrollbar.config(command=self.task_tree.yview)
         
         # Bind double-click to toggle task status
         self.task_tree.bind("<Double-1>", self.toggle_task_status)
         
         # Bind right-click to show context menu
         self.task_tree.bind("<Button-3>", self.show_context_menu)
+        
+        # Delete key removes the selected tasks
+        self.task_tree.bind("<Delete>", lambda event: self.delete_selected_task())
+        
+        # Subtasks are inserted when their parent is first opened
+        self.task_tree.bind("<<TreeviewOpen>>", self.on_open)
+        
+        # Tag colors and fonts come from the theme; rows only reference the tags
+        self.theme_manager.register_tree(self.task_tree)
+        
+        # Apply task changes to the affected rows only
+        self.task_manager.add_listener(self.on_tasks_changed)
     
     def toggle_task_status(self, event):
         """Toggle a task's completion status on double-click"""
@@ -177,11 +644,8 @@ class TaskListComponent:
         if not selected_item:
             return
         
-        # Get the task ID from the first selected item
-        task_id = selected_item[0]
-        
-        # Toggle the status
-        if self.task_manager.toggle_task_status(task_id):
+        # Toggle the status of every selected task at once
+        if self.task_manager.toggle_tasks(selected_item):
             self.update_callback()
     
     def show_context_menu(self, event):
@@ -191,33 +655,42 @@ class TaskListComponent:
         if not item:
             return
         
-        # Select the item
-        self.task_tree.selection_set(item)
+        # Keep a multi-selection that includes the item, otherwise select just it
+        if item not in self.task_tree.selection():
+            self.task_tree.selection_set(item)
+        count = len(self.task_tree.selection())
+        noun = "Task" if count == 1 else f"{count} Tasks"
         
         # Create a context menu
         context_menu = tk.Menu(self.frame, tearoff=0)
-        context_menu.add_command(label="Delete Task", command=self.delete_selected_task)
-        context_menu.add_command(label="Edit Task", command=self.edit_selected_task)
+        context_menu.add_command(label=f"Delete {noun}", command=self.delete_selected_task)
+        context_menu.add_command(
+            label="Edit Task",
+            command=self.edit_selected_task,
+            state=tk.NORMAL if count == 1 else tk.DISABLED
+        )
+        context_menu.add_command(
+            label="Add Subtask",
+            command=self.add_subtask,
+            state=tk.NORMAL if count == 1 else tk.DISABLED
+        )
+        context_menu.add_command(label=f"Move {noun} to Top Level", command=self.move_to_top_level)
         context_menu.add_separator()
-        context_menu.add_command(label="Mark as Completed", command=lambda: self.mark_task_as(True))
-        context_menu.add_command(label="Mark as Pending", command=lambda: self.mark_task_as(False))
+        context_menu.add_command(label=f"Mark {noun} as Completed", command=lambda: self.mark_task_as(True))
+        context_menu.add_command(label=f"Mark {noun} as Pending", command=lambda: self.mark_task_as(False))
         
         # Display the context menu
         context_menu.tk_popup(event.x_root, event.y_root)
     
     def delete_selected_task(self):
-        """Delete the selected task"""
+        """Delete the selected tasks (Ctrl+Z brings them back)"""
         selected_item = self.task_tree.selection()
         if not selected_item:
             return
         
-        if messagebox.askyesno("Confirm", "Are you sure you want to delete this task?"):
-            # Get the task ID
-            task_id = selected_item[0]
-            
-            # Delete the task
-            self.task_manager.delete_task(task_id)
-            self.update_callback()
+        # Delete all selected tasks with a single save
+        self.task_manager.delete_tasks(selected_item)
+        self.update_callback()
     
     def edit_selected_task(self):
         """Edit the selected task"""
@@ -229,103 +702,396 @@ class TaskListComponent:
         task_id = selected_item[0]
         
         # Find the task
-        for task in self.task_manager.tasks:
-            if task["id"] == task_id:
-                # Create a dialog for editing
-                edit_window = tk.Toplevel(self.frame)
-                edit_window.title("Edit Task")
-                edit_window.geometry("400x200")
-                edit_window.resizable(False, False)
-                
-                # Make dialog modal
-                edit_window.transient(self.frame.winfo_toplevel())
-                edit_window.grab_set()
-                
-                # Set dialog style
-                edit_window.configure(bg=self.theme_manager.colors["bg_main"])
-                
-                # Task description
-                ttk.Label(edit_window, text="Task Description:", style="TLabel").pack(pady=(20, 5))
-                
-                description_entry = ttk.Entry(edit_window, font=self.theme_manager.text_font, width=40)
-                description_entry.pack(padx=20, fill=tk.X)
-                description_entry.insert(0, task["description"])
-                
-                # Priority selection
-                priority_frame = ttk.Frame(edit_window, style="TFrame")
-                priority_frame.pack(pady=10)
-                
-                priority_var = tk.StringVar(value=task["priority"])
-                ttk.Label(priority_frame, text="Priority:", style="TLabel").pack(side=tk.LEFT)
-                
-                ttk.Radiobutton(priority_frame, text="High", variable=priority_var, value="high").pack(side=tk.LEFT)
-                ttk.Radiobutton(priority_frame, text="Medium", variable=priority_var, value="medium").pack(side=tk.LEFT)
-                ttk.Radiobutton(priority_frame, text="Low", variable=priority_var, value="low").pack(side=tk.LEFT)
-                
-                # Button frame
-                button_frame = ttk.Frame(edit_window, style="TFrame")
-                button_frame.pack(pady=10)
-                
-                # Save button
-                def save_changes():
-                    self.task_manager.update_task(
-                        task_id,
-                        description=description_entry.get(),
-                        priority=priority_var.get()
-                    )
-                    self.update_callback()
-                    edit_window.destroy()
-                
-                ttk.Button(button_frame, text="Save Changes", command=save_changes).pack(side=tk.LEFT, padx=5)
-                ttk.Button(button_frame, text="Cancel", command=edit_window.destroy).pack(side=tk.LEFT, padx=5)
-                
-                # Focus on the entry widget
-                description_entry.focus_set()
-                
-                break
+        task = self.task_manager.get_task(task_id)
+        if task is None:
+            return
+        
+        # Create a dialog for editing
+        edit_window = tk.Toplevel(self.frame)
+        edit_window.title("Edit Task")
+        edit_window.geometry("400x260")
+        edit_window.resizable(False, False)
+        
+        # Make dialog modal
+        edit_window.transient(self.frame.winfo_toplevel())
+        edit_window.grab_set()
+        
+        # Set dialog style
+        edit_window.configure(bg=self.theme_manager.colors["bg_main"])
+        
+        # Task description
+        ttk.Label(edit_window, text="Task Description:", style="TLabel").pack(pady=(20, 5))
+        
+        description_entry = ttk.Entry(edit_window, font=self.theme_manager.text_font, width=40)
+        description_entry.pack(padx=20, fill=tk.X)
+        description_entry.insert(0, task.description)
+        
+        # Priority selection
+        priority_frame = ttk.Frame(edit_window, style="TFrame")
+        priority_frame.pack(pady=10)
+        
+        priority_var = tk.StringVar(value=task.priority)
+        ttk.Label(priority_frame, text="Priority:", style="TLabel").pack(side=tk.LEFT)
+        
+        ttk.Radiobutton(priority_frame, text="High", variable=priority_var, value="high").pack(side=tk.LEFT)
+        ttk.Radiobutton(priority_frame, text="Medium", variable=priority_var, value="medium").pack(side=tk.LEFT)
+        ttk.Radiobutton(priority_frame, text="Low", variable=priority_var, value="low").pack(side=tk.LEFT)
+        
+        # Due date; leave empty for none
+        ttk.Label(edit_window, text="Due (YYYY-MM-DD HH:MM):", style="TLabel").pack()
+        
+        due_entry = ttk.Entry(edit_window, font=self.theme_manager.text_font, width=20)
+        due_entry.pack()
+        due_entry.insert(0, task.due_date)
+        
+        # Button frame
+        button_frame = ttk.Frame(edit_window, style="TFrame")
+        button_frame.pack(pady=10)
+        
+        # Save button
+        def save_changes():
+            try:
+                self.task_manager.update_task(
+                    task_id,
+                    description=description_entry.get(),
+                    priority=priority_var.get(),
+                    due=due_entry.get()
+                )
+            except TaskValidationError as e:
+                messagebox.showwarning("Warning", str(e), parent=edit_window)
+                return
+            self.update_callback()
+            edit_window.destroy()
+        
+        ttk.Button(button_frame, text="Save Changes", command=save_changes).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=edit_window.destroy).pack(side=tk.LEFT, padx=5)
+        
+        # Focus on the entry widget
+        description_entry.focus_set()
     
     def mark_task_as(self, completed):
-        """Mark the selected task as completed or pending"""
+        """Mark the selected tasks as completed or pending"""
         selected_item = self.task_tree.selection()
         if not selected_item:
             return
         
-        # Get the task ID
-        task_id = selected_item[0]
+        # Update all selected tasks with a single save
+        self.task_manager.update_tasks(selected_item, completed=completed)
+        self.update_callback()
+    
+    def add_subtask(self):
+        """Ask for a description and add it as a subtask of the selected task"""
+        selected_item = self.task_tree.selection()
+        if not selected_item:
+            return
+        
+        parent = self.task_manager.get_task(selected_item[0])
+        if parent is None:
+            return
+        
+        description = simpledialog.askstring(
+            "Add Subtask", f"Subtask of \"{parent.description}\":", parent=self.frame.winfo_toplevel()
+        )
+        if not description:
+            return
+        
+        try:
+            self.task_manager.add_task(description, parent.priority, parent=parent.id)
+        except TaskValidationError as e:
+            messagebox.showwarning("Warning", str(e))
+            return
         
-        # Update the task
-        self.task_manager.update_task(task_id, completed=completed)
+        # Show the new subtask
+        self.task_tree.item(parent.id, open=True)
+        self.expand(parent.id)
         self.update_callback()
     
-    def refresh_task_list(self):
-        """Refresh the task list display"""
-        import tkinter.font as font
+    def move_to_top_level(self):
+        """Detach the selected tasks from their parents"""
+        selected_item = self.task_tree.selection()
+        if not selected_item:
+            return
         
+        self.task_manager.update_tasks(selected_item, parent="")
+        self.update_callback()
+    
+    def destroy(self):
+        """Stop following task changes and remove the list from the window"""
+        self.task_manager.remove_listener(self.on_tasks_changed)
+        self.frame.destroy()
+    
+    def set_filter(self, criteria):
+        """Change the search criteria (None shows all); refresh_task_list shows them"""
+        self.filter = criteria
+        self.matches = None
+    
+    def filtered_tasks(self):
+        """Return the tasks matching the filter, searching only after a change"""
+        if self.matches is None:
+            self.matches = self.task_manager.search_tasks(**self.filter)
+        return self.matches
+    
+    @metrics.timed("refresh_task_list")
+    def refresh_task_list(self):
+        """Rebuild the whole task list display"""
         # Clear the treeview
-        for item in self.task_tree.get_children():
-            self.task_tree.delete(item)
-        
-        # Get sorted tasks
-        sorted_tasks = self.task_manager.get_sorted_tasks()
-        
-        # Add tasks to the treeview
-        for task in sorted_tasks:
-            task_id = task["id"]
-            status = "Completed" if task["completed"] else "Pending"
-            
-            # Set tag based on priority and completion status
-            tags = (task["priority"], "completed" if task["completed"] else "pending")
-            
-            # Insert the task
-            self.task_tree.insert("", tk.END, task_id, values=(
-                task["description"],
-                task["priority"].capitalize(),
-                task["date_created"],
-                status
-            ), tags=tags)
-        
-        # Configure tag colors
-        self.task_tree.tag_configure("high", foreground=self.theme_manager.colors["high_priority"])
-        self.task_tree.tag_configure("medium", foreground=self.theme_manager.colors["medium_priority"])
-        self.task_tree.tag_configure("low", foreground=self.theme_manager.colors["low_priority"])
-        self.task_tree.tag_configure("completed", font=font.Font(family="Helvetica", size=10, overstrike=1))
\ No newline at end of file
+        self.task_tree.delete(*self.task_tree.get_children())
+        self.expanded = set()
+        
+        # Add tasks to the treeview in sorted order; subtasks wait until opened
+        if self.filter:
+            tasks = self.filtered_tasks()
+        else:
+            tasks = self.task_manager.iter_top_level_tasks()
+        rows = 0
+        for task in tasks:
+            self.insert_row("", tk.END, task)
+            rows += 1
+        metrics.set_gauge("list_rows", rows)
+    
+    def insert_row(self, parent, index, task):
+        """Insert a task's row, with a placeholder if it has subtasks"""
+        self.task_tree.insert(parent, index, task.id, values=self.row_values(task), tags=self.row_tags(task))
+        self.expanded.discard(task.id)
+        if not self.filter and self.task_manager.has_children(task.id):
+            self.task_tree.insert(task.id, tk.END, PLACEHOLDER_PREFIX + task.id)
+    
+    def on_open(self, event):
+        """Insert the subtasks of the task being opened"""
+        self.expand(self.task_tree.focus())
+    
+    @metrics.timed("expand_task")
+    def expand(self, task_id):
+        """Replace a task's placeholder row with its subtasks"""
+        if not task_id or task_id in self.expanded or self.filter:
+            return
+        
+        self.task_tree.delete(*self.task_tree.get_children(task_id))
+        for child in self.task_manager.get_children(task_id):
+            self.insert_row(task_id, tk.END, child)
+        self.expanded.add(task_id)
+    
+    @metrics.timed("apply_task_changes")
+    def on_tasks_changed(self, event):
+        """Update only the rows affected by a task change"""
+        # A filtered list is small; re-run the search instead of diffing
+        self.matches = None
+        if event.reset or self.filter:
+            self.refresh_task_list()
+            return
+        
+        # Rows whose subtask counts or subtask rows may have changed; for
+        # tasks that left a parent, the event tells which one it was
+        parents = set()
+        for parent_id in event.old_parents.values():
+            parents.update(self.task_chain(parent_id))
+        
+        # Subtasks of removed tasks move to the top level, and subtasks of
+        # added tasks (e.g. a project brought back by undo) move under them
+        changed = set(event.added) | set(event.updated)
+        for task_id in event.added:
+            changed.update(child.id for child in self.task_manager.get_children(task_id))
+        for task_id in event.removed:
+            if self.task_tree.exists(task_id):
+                parents.update(self.row_ancestors(task_id))
+                self.task_tree.delete(task_id)
+            changed.update(child.id for child in self.task_manager.get_children(task_id))
+        
+        tasks = [self.task_manager.get_task(task_id) for task_id in changed]
+        tasks = [task for task in tasks if task is not None]
+        
+        # Detach the changed rows so the remaining rows are in final order
+        by_parent = {"": []}
+        for task in tasks:
+            if self.task_tree.exists(task.id):
+                parents.update(self.row_ancestors(task.id))
+                self.task_tree.detach(task.id)
+            if self.task_manager.is_top_level(task):
+                by_parent[""].append(task)
+            else:
+                by_parent.setdefault(task.parent, []).append(task)
+                parents.update(self.task_ancestors(task))
+        
+        # Place the changed rows among their siblings, top to bottom;
+        # subtasks only have rows under open parents
+        placed = set()
+        sort_key = self.task_manager.get_display_index
+        for parent_id, children in by_parent.items():
+            if parent_id and (parent_id not in self.expanded or not self.task_tree.exists(parent_id)):
+                continue
+            keys = [sort_key(task_id) for task_id in self.task_tree.get_children(parent_id)]
+            for task in sorted(children, key=lambda task: sort_key(task.id)):
+                key = sort_key(task.id)
+                index = bisect_left(keys, key)
+                keys.insert(index, key)
+                self.place_row(parent_id, index, task)
+                placed.add(task.id)
+        
+        # Refresh the counts of the parents above the changes
+        for parent_id in parents:
+            parent = self.task_manager.get_task(parent_id)
+            if parent is None or not self.task_tree.exists(parent_id):
+                continue
+            self.task_tree.item(parent_id, values=self.row_values(parent))
+            if parent_id in self.expanded:
+                continue
+            if self.task_manager.has_children(parent_id) != bool(self.task_tree.get_children(parent_id)):
+                # Add or drop the placeholder behind the expand arrow
+                self.task_tree.delete(*self.task_tree.get_children(parent_id))
+                if self.task_manager.has_children(parent_id):
+                    self.task_tree.insert(parent_id, tk.END, PLACEHOLDER_PREFIX + parent_id)
+        
+        # Changed subtasks of collapsed parents have no row
+        unplaced = [task.id for task in tasks if task.id not in placed and self.task_tree.exists(task.id)]
+        if unplaced:
+            self.task_tree.delete(*unplaced)
+    
+    def place_row(self, parent, index, task):
+        """Move a task's row to a position, inserting it if it has none"""
+        if self.task_tree.exists(task.id):
+            self.task_tree.item(task.id, values=self.row_values(task), tags=self.row_tags(task))
+            self.task_tree.move(task.id, parent, index)
+        else:
+            self.insert_row(parent, index, task)
+    
+    def row_ancestors(self, row_id):
+        """Yield the rows above a row"""
+        row_id = self.task_tree.parent(row_id)
+        while row_id:
+            yield row_id
+            row_id = self.task_tree.parent(row_id)
+    
+    def task_chain(self, task_id):
+        """Yield a task's ID and the IDs of the loaded tasks above it"""
+        task = self.task_manager.get_task(task_id)
+        if task is not None:
+            yield task_id
+            yield from self.task_ancestors(task)
+    
+    def task_ancestors(self, task):
+        """Yield the IDs of the loaded tasks above a task"""
+        seen = set()
+        while task is not None and task.parent is not None and task.parent not in seen:
+            seen.add(task.parent)
+            task = self.task_manager.get_task(task.parent)
+            if task is not None:
+                yield task.id
+    
+    def row_values(self, task):
+        """Return the column values shown for a task"""
+        status = "Completed" if task.completed else "Pending"
+        done, total = self.task_manager.get_rollup(task.id)
+        return (
+            task.description,
+            task.priority.capitalize(),
+            task.date_created,
+            task.due_date,
+            status,
+            f"{done}/{total}" if total else ""
+        )
+    
+    def row_tags(self, task):
+        """Return the tags based on priority and completion status"""
+        return (task.priority, "completed" if task.completed else "pending")
+
+
+class VirtualTaskListComponent(TaskListComponent):
+    """Task list that only creates Treeview rows for the visible window
+    
+    The scrollbar is driven by an offset into the sorted task sequence, so
+    memory and render time depend on the window height, not the task count.
+    """
+    
+    # Extra rows rendered below the viewport to cover partially visible rows
+    OVERSCAN = 2
+    
+    def __init__(self, parent, theme_manager, task_manager, update_callback):
+        super().__init__(parent, theme_manager, task_manager, update_callback)
+        
+        # Index of the first visible task in display order
+        self.offset = 0
+        self.total = 0
+        
+        # A flat list of all tasks; subtasks are not nested here
+        self.task_tree.configure(show="headings")
+        
+        # Take the scrollbar over from the treeview
+        self.task_tree.configure(yscrollcommand="")
+        self.scrollbar.config(command=self.on_scroll)
+        
+        # Re-render when the viewport size changes or the wheel is used
+        self.task_tree.bind("<Configure>", lambda event: self.render_window())
+        self.task_tree.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.task_tree.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.task_tree.bind("<Button-5>", lambda event: self.scroll_by(3))
+    
+    def visible_rows(self):
+        """Return how many rows fit in the viewport"""
+        try:
+            row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 40)
+        except ValueError:
+            row_height = 40
+        return max(1, self.task_tree.winfo_height() // row_height)
+    
+    def refresh_task_list(self):
+        """Rebuild the visible rows"""
+        self.render_window()
+    
+    def on_tasks_changed(self, event):
+        """Re-render the visible rows after any task change"""
+        self.matches = None
+        self.render_window()
+    
+    def expand(self, task_id):
+        """Do nothing; subtasks already have rows of their own in the flat list"""
+    
+    @metrics.timed("render_window")
+    def render_window(self):
+        """Materialize the tasks in the current viewport"""
+        if self.filter:
+            matches = self.filtered_tasks()
+            self.total = len(matches)
+        else:
+            self.total = self.task_manager.get_statistics()["total"]
+        
+        # Keep the offset inside the task sequence
+        visible = self.visible_rows()
+        self.offset = max(0, min(self.offset, self.total - visible))
+        stop = self.offset + visible + self.OVERSCAN
+        if self.filter:
+            window = matches[self.offset:stop]
+        else:
+            window = self.task_manager.get_tasks_slice(self.offset, stop)
+        
+        # Replace the rows, keeping the selection of rows still in view
+        selection = self.task_tree.selection()
+        self.task_tree.delete(*self.task_tree.get_children())
+        for task in window:
+            self.task_tree.insert("", tk.END, task.id, values=self.row_values(task), tags=self.row_tags(task))
+        metrics.set_gauge("list_rows", len(window))
+        self.task_tree.selection_set([task_id for task_id in selection if self.task_tree.exists(task_id)])
+        
+        # Map the window onto the scrollbar
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, min(1.0, (self.offset + visible) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def scroll_by(self, rows):
+        """Move the viewport by a number of rows"""
+        self.offset += rows
+        self.render_window()
+    
+    def on_scroll(self, action, amount, unit=None):
+        """Handle scrollbar drags and clicks"""
+        if action == "moveto":
+            self.offset = int(float(amount) * self.total)
+            self.render_window()
+        elif action == "scroll":
+            step = self.visible_rows() if unit == "pages" else 1
+            self.scroll_by(int(amount) * step)
+    
+    def on_mouse_wheel(self, event):
+        """Scroll the viewport with the mouse wheel"""
+        self.scroll_by(-3 if event.delta > 0 else 3)
+        return "break"
@@ -0,0 +1,87 @@
+# undo_history.py - Bounded undo/redo stacks of reversible task changes
+
+from collections import deque
+
+class Change:
+    """A reversible group of task mutations, stored as deltas
+
+    Steps are kept in the order they happened:
+      ("add", [task, ...])                  tasks that were added
+      ("remove", [(sequence, task), ...])   removed tasks and their display sequence
+      ("update", [(task_id, old, new), ...]) changed fields only, as dicts
+    Removed tasks are the Task objects themselves, so a change costs one
+    reference per task rather than a copy of the task list.
+    """
+
+    __slots__ = ("steps", "size")
+
+    def __init__(self):
+        self.steps = []
+        self.size = 0
+
+    def add_step(self, kind, items):
+        """Append a step unless it has no items"""
+        if items:
+            self.steps.append((kind, items))
+            self.size += len(items)
+
+    def merge(self, other):
+        """Append the steps of a later change"""
+        self.steps.extend(other.steps)
+        self.size += other.size
+
+
+class UndoHistory:
+    """Undo and redo stacks with a cap on entries and on tasks referenced
+
+    The oldest changes are dropped first once either limit is passed. The
+    newest change is always kept, however large, so the last action can
+    be undone.
+    """
+
+    def __init__(self, max_changes=100, max_items=100000):
+        self.max_changes = max_changes
+        self.max_items = max_items
+        self._undo = deque()
+        self._redo = []
+        self._undo_items = 0
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        """Forget all changes"""
+        self._undo.clear()
+        self._redo = []
+        self._undo_items = 0
+
+    def push(self, change):
+        """Record a new change; this discards the redo stack"""
+        self._redo = []
+        self.push_undo(change)
+
+    def push_undo(self, change):
+        """Put a change on the undo stack, keeping the redo stack"""
+        self._undo.append(change)
+        self._undo_items += change.size
+        while len(self._undo) > 1 and (len(self._undo) > self.max_changes or self._undo_items > self.max_items):
+            self._undo_items -= self._undo.popleft().size
+
+    def pop_undo(self):
+        """Take the newest change off the undo stack, or return None"""
+        if not self._undo:
+            return None
+        change = self._undo.pop()
+        self._undo_items -= change.size
+        return change
+
+    def push_redo(self, change):
+        """Put an undone change on the redo stack"""
+        self._redo.append(change)
+
+    def pop_redo(self):
+        """Take the newest change off the redo stack, or return None"""
+        return self._redo.pop() if self._redo else None